@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
-from crewai import Crew, LLM
+from typing import Any, Dict, List, Optional
+from crewai import Crew
 from trip_agents2 import TripAgents
 from trip_tasks import TripTasks
+from jobs import JobManager, QueueFullError
+from coalesce import SingleFlight, request_key
+from resources import get_router_llm
+from dag import CREW_EXECUTOR, build_trip_graph, graph_workers, run_dag, single_city
+from checkpoints import TaskCheckpoint
+from usage import process_usage, track_run
+from itinerary import Itinerary, StreamingItinerary, parse_itinerary
+from tools import events, http_session
+from tools.cache import build_cache
+import metrics
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 from functools import lru_cache
 
@@ -28,6 +42,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /jobs/{job_id} stays one series
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        metrics.observe_request(request.method, path, status, started)
+
 class TripRequest(BaseModel):
     origin: str = Field(..., 
         example="Bangalore, India",
@@ -50,6 +78,25 @@ class TripResponse(BaseModel):
     message: str
     itinerary: Optional[str] = None
     error: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    structured: Optional[Itinerary] = None
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    partial: List[Dict[str, Optional[str]]] = []
+    itinerary: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    days_ready: int = 0
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 class Settings:
     def __init__(self):
@@ -76,19 +123,42 @@ def validate_api_keys(settings: Settings = Depends(get_settings)):
         )
     return settings
 
+PLANNER_MODEL = "gemini/gemini-2.5-flash"
+# Streamed answers let job clients read finished days while the plan is written
+PLANNER_STREAM = os.getenv("PLANNER_STREAM", "true").lower() in ("1", "true", "yes")
+
+def planner_llm():
+    return get_router_llm(PLANNER_MODEL, stream=True) if PLANNER_STREAM else get_router_llm(PLANNER_MODEL)
+
 class TripCrew:
     def __init__(self, origin, destination, date_range, interests):
         self.destination = destination
         self.origin = origin
         self.interests = interests
         self.date_range = date_range
-        self.llm = LLM(model="gemini/gemini-2.5-flash")
+        self.llm = planner_llm()
+        self.checkpoint = TaskCheckpoint(request_key(
+            origin=origin, destination=destination, date_range=date_range, interests=interests
+        ))
 
-    def run(self):
+    def run(self, task_callback=None):
         try:
             agents = TripAgents(llm=self.llm)
             tasks = TripTasks()
 
+            if CREW_EXECUTOR == "dag":
+                graph = build_trip_graph(
+                    agents, tasks, self.origin, self.destination, self.interests, self.date_range
+                )
+                outputs = run_dag(
+                    graph,
+                    max_workers=graph_workers(graph),
+                    on_task_done=task_callback,
+                    checkpoint=self.checkpoint
+                )
+                self.checkpoint.clear([node.key for node in graph])
+                return outputs["final_itinerary"].raw
+
             city_selector_agent = agents.city_selection_agent()
             local_expert_agent = agents.local_expert()
             travel_concierge_agent = agents.travel_concierge()
@@ -105,7 +175,8 @@ class TripCrew:
                 local_expert_agent,
                 self.origin,
                 self.interests,
-                self.date_range
+                self.date_range,
+                city=single_city(self.destination)
             )
 
             plan_task = tasks.plan_task(
@@ -120,18 +191,12 @@ class TripCrew:
                     city_selector_agent, local_expert_agent, travel_concierge_agent
                 ],
                 tasks=[identify_task, gather_task, plan_task],
-                verbose=True
+                verbose=True,
+                task_callback=task_callback
             )
 
             result = crew.kickoff()
-            # Convert CrewOutput to string and ensure it's properly formatted
-            # return result.raw if hasattr(result, 'raw') else str(result)
-            if hasattr(result, 'output_text'):
-                return result.output_text
-            elif hasattr(result, 'final_output'):
-                return result.final_output
-            else:
-                return str(result)
+            return result.raw
             
         except Exception as e:
             raise HTTPException(
@@ -139,6 +204,31 @@ class TripCrew:
                 detail=str(e)
             )
 
+job_manager = JobManager()
+
+# Identical in-flight plans share one crew run; PLAN_CACHE_BACKEND=memory also
+# keeps finished plans for PLAN_CACHE_TTL seconds
+plan_flight = SingleFlight(cache=build_cache("PLAN_CACHE", default_ttl=300, default_backend="none"))
+
+metrics.registry.register(metrics.Gauge(
+    "vacaigent_crews_in_flight", "Crew runs currently executing",
+    lambda: job_manager.running_count() + plan_flight.in_flight()))
+metrics.registry.register(metrics.Gauge(
+    "vacaigent_job_queue_depth", "Background jobs waiting for a worker", job_manager.queued_count))
+
+@app.on_event("startup")
+def warm_up_resources():
+    # Build the shared LLM client and tools once, before the first request
+    TripAgents(llm=planner_llm())
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_session.aclose_client()
+
 @app.get("/")
 async def root():
     return {
@@ -163,14 +253,27 @@ async def plan_trip(
     date_range = f"{trip_request.start_date} to {trip_request.end_date}"
 
     try:
-        trip_crew = TripCrew(
-            trip_request.origin,
-            trip_request.destination,
-            date_range,
-            trip_request.interests
+        def run_crew():
+            trip_crew = TripCrew(
+                trip_request.origin,
+                trip_request.destination,
+                date_range,
+                trip_request.interests
+            )
+            with track_run(uuid.uuid4().hex) as run_usage:
+                itinerary = trip_crew.run()
+            return {
+                "itinerary": itinerary,
+                "usage": run_usage.as_dict(),
+                "structured": parse_itinerary(itinerary).model_dump()
+            }
+
+        # The crew is fully synchronous, keep it off the event loop
+        result = await plan_flight.do(
+            request_key(**trip_request.model_dump()),
+            lambda: run_in_threadpool(run_crew)
         )
-        
-        itinerary = trip_crew.run()
+        itinerary = result["itinerary"]
         
         # Ensure itinerary is a string
         if not isinstance(itinerary, str):
@@ -179,7 +282,9 @@ async def plan_trip(
         return TripResponse(
             status="success",
             message="Trip plan generated successfully",
-            itinerary=itinerary
+            itinerary=itinerary,
+            usage=result["usage"],
+            structured=result["structured"]
         )
     
     except Exception as e:
@@ -189,11 +294,108 @@ async def plan_trip(
             error=str(e)
         )
 
+@app.post("/api/v1/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_trip_job(
+    trip_request: TripRequest,
+    settings: Settings = Depends(validate_api_keys)
+):
+    if trip_request.end_date <= trip_request.start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="End date must be after start date"
+        )
+
+    date_range = f"{trip_request.start_date} to {trip_request.end_date}"
+
+    def run_job(job):
+        trip_crew = TripCrew(
+            trip_request.origin,
+            trip_request.destination,
+            date_range,
+            trip_request.interests
+        )
+
+        def on_task_done(output):
+            name = getattr(output, "name", None) or getattr(output, "agent", None)
+            job.add_partial(name, getattr(output, "raw", None) or str(output))
+
+        def on_days(itinerary):
+            job.itinerary = itinerary
+
+        try:
+            with track_run(job.id) as run_usage, events.listen(StreamingItinerary(on_update=on_days)):
+                try:
+                    itinerary = trip_crew.run(task_callback=on_task_done)
+                finally:
+                    job.usage = run_usage.as_dict()
+        except HTTPException as e:
+            raise RuntimeError(e.detail)
+        itinerary = itinerary if isinstance(itinerary, str) else str(itinerary)
+        job.itinerary = parse_itinerary(itinerary)
+        return itinerary
+
+    try:
+        job = job_manager.submit(run_job, params=trip_request.model_dump(mode="json"))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return JobSubmitResponse(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/api/v1/jobs/{job.id}"
+    )
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_trip_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job.as_dict())
+
+@app.get("/api/v1/jobs/{job_id}/itinerary")
+async def get_trip_job_itinerary(
+    job_id: str,
+    days: Optional[str] = Query(None, description="Day numbers to return, e.g. 1,2 or 1-3"),
+    sections: Optional[str] = Query(None, description="Any of days, hotels, costs, packing_list")
+):
+    """Structured itinerary of a job; days appear one by one while the plan is being written."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    itinerary = job.itinerary or Itinerary()
+    try:
+        wanted_days = parse_day_numbers(days) if days else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="days must look like 1,2 or 1-3")
+    wanted_sections = [part.strip() for part in sections.split(",") if part.strip()] if sections else None
+    return itinerary.subset(days=wanted_days, sections=wanted_sections)
+
+def parse_day_numbers(spec: str):
+    numbers = set()
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        numbers.update(range(int(start), int(end or start) + 1))
+    return numbers
+
+@app.get("/api/v1/metrics/usage")
+async def usage_metrics():
+    """Tokens, latency and estimated cost since startup, by task, agent, model and tool."""
+    return process_usage.as_dict()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, crew, tool, cache and LLM metrics."""
+    return PlainTextResponse(metrics.registry.exposition(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/v1/health")
 async def health_check():
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "jobs": {
+            "running": job_manager.running_count(),
+            "queued": job_manager.queued_count()
+        }
     }
 
 if __name__ == "__main__":
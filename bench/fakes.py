@@ -0,0 +1,152 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from crewai.llms.base_llm import BaseLLM
+
+# ----------------------------------------------------------------------
+# Offline stand-ins for Gemini/OpenAI, Serper and browserless so the
+# project's own overhead can be measured without network or API keys.
+# ----------------------------------------------------------------------
+
+
+def fake_itinerary(days: int = 3, words_per_day: int = 60) -> str:
+    filler = " ".join(["explore"] * words_per_day)
+    sections = [f"## Day {day}\n- Morning: {filler}\n- Evening: dinner ($25)" for day in range(1, days + 1)]
+    return "# Trip Plan\n\n" + "\n\n".join(sections)
+
+
+class FakeLLM(BaseLLM):
+    """Deterministic LLM: sleeps ``latency`` seconds and returns a final answer."""
+
+    def __init__(self, model: str = "fake/llm", latency: float = 0.05, output_words: int = 200, **kwargs):
+        super().__init__(model=model)
+        self.latency = latency
+        self.output_words = output_words
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        answer = fake_itinerary(days=3, words_per_day=max(1, self.output_words // 3))
+        # ReAct-style agents stop as soon as they see a final answer
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+
+def fake_llm_factory(latency: float = 0.05, output_words: int = 200):
+    """Factory for ``resources.set_llm_factory`` producing FakeLLM clients."""
+    def factory(model, **kwargs):
+        return FakeLLM(model=f"fake/{model}", latency=latency, output_words=output_words)
+    return factory
+
+
+def fake_search_response(query: str, results: int = 8) -> dict:
+    return {
+        "searchParameters": {"q": query},
+        "organic": [
+            {
+                "title": f"{query} - result {i}",
+                "link": f"https://example.com/{i}/{query.replace(' ', '-')}",
+                "snippet": f"Everything about {query}, part {i}.",
+            }
+            for i in range(1, results + 1)
+        ],
+    }
+
+
+def fake_page(paragraphs: int = 200) -> str:
+    body = "\n".join(
+        f"<p>Paragraph {i}: local food, hiking trails, hotel prices and weather notes.</p>"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><title>Fake travel page</title></head><body><nav>Home | About</nav>{body}<footer>Cookies</footer></body></html>"
+
+
+class FakeServices:
+    """
+    Local HTTP server standing in for Serper (``/search``) and browserless (``/content``).
+
+    Use as a context manager; ``search_url`` and ``browserless_url`` point at it.
+    """
+
+    def __init__(self, latency: float = 0.02, page_paragraphs: int = 200, status_code: int = 200):
+        self.latency = latency
+        self.page_paragraphs = page_paragraphs
+        self.status_code = status_code
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                services.requests += 1
+                time.sleep(services.latency)
+
+                if services.status_code != 200:
+                    payload, content_type = b"{}", "application/json"
+                elif self.path.startswith("/search"):
+                    payload = json.dumps(fake_search_response(body.get("q", ""))).encode()
+                    content_type = "application/json"
+                elif self.path.startswith("/content"):
+                    payload = fake_page(services.page_paragraphs).encode()
+                    content_type = "text/html"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(services.status_code)
+                self.send_header("content-type", content_type)
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    @property
+    def browserless_url(self) -> str:
+        return f"{self.base_url}/content"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,227 @@
+"""
+Offline end-to-end benchmarks.
+
+Runs TripCrew, the tools and the FastAPI endpoints against FakeLLM and the
+local Serper/browserless stand-ins, then reports latency percentiles,
+throughput and peak RSS.
+
+    python -m bench.run_bench --suite all --iterations 20 --concurrency 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeServices, fake_llm_factory
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(name, func, iterations, concurrency):
+    """Call ``func()`` ``iterations`` times on ``concurrency`` threads."""
+    def timed(_):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "throughput_rps": round(iterations / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def trip_args():
+    start = date.today() + timedelta(days=30)
+    return {
+        "origin": "Bangalore, India",
+        "destination": "Krabi, Thailand",
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=5)).isoformat(),
+        "interests": "2 adults who love swimming, hiking and local food",
+    }
+
+
+def checked(name, result):
+    """Tools report failures as "Error..." strings; fail the iteration instead of timing them."""
+    if result is None or str(result).startswith("Error"):
+        raise RuntimeError(f"{name} failed: {result}")
+    return result
+
+
+def bench_search(iterations, concurrency):
+    from tools.search_tools import SearchTools
+    tool = SearchTools()
+    counter = iter(range(10 ** 9))
+    # Distinct queries so the response cache does not hide the HTTP path
+    return measure("SearchTools._run",
+                   lambda: checked("SearchTools._run", tool._run(f"weather in Krabi {next(counter)}")),
+                   iterations, concurrency)
+
+
+def bench_browser(iterations, concurrency):
+    from tools.browser_tools import BrowserTools
+    tool = BrowserTools()
+    counter = iter(range(10 ** 9))
+    return measure("BrowserTools._run",
+                   lambda: checked("BrowserTools._run", tool._run(f"https://example.com/page/{next(counter)}")),
+                   iterations, concurrency)
+
+
+def bench_trip_crew(iterations, concurrency):
+    from api_app import TripCrew
+    args = trip_args()
+    date_range = f"{args['start_date']} to {args['end_date']}"
+    return measure(
+        "TripCrew.run",
+        lambda: TripCrew(args["origin"], args["destination"], date_range, args["interests"]).run(),
+        iterations, concurrency,
+    )
+
+
+def bench_api(iterations, concurrency):
+    from fastapi.testclient import TestClient
+    from api_app import app
+    client = TestClient(app)
+    counter = iter(range(10 ** 9))
+
+    def plan():
+        # Unique interests per call so request coalescing does not merge them
+        body = dict(trip_args(), interests=f"hiking and food #{next(counter)}")
+        response = client.post("/api/v1/plan-trip", json=body)
+        response.raise_for_status()
+        # Crew failures come back as 200 with status "error"; do not time those
+        payload = response.json()
+        if payload.get("status") != "success":
+            raise RuntimeError(f"plan-trip failed: {payload.get('error') or payload}")
+
+    results = [
+        measure("GET /api/v1/health", lambda: client.get("/api/v1/health").raise_for_status(),
+                iterations, concurrency),
+        measure("POST /api/v1/plan-trip", plan, iterations, concurrency),
+    ]
+    return results
+
+
+# UI/parsing dependencies that must not load when a server or the CLI starts
+HEAVY_MODULES = ("streamlit", "unstructured", "langchain_openai", "langchain_groq")
+ENTRY_POINTS = ("api_app", "cli_app")
+
+
+def leaked_modules(module):
+    """Heavy modules loaded as a side effect of importing ``module`` in a fresh interpreter."""
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_imports(iterations, concurrency):
+    results = []
+    for module in ENTRY_POINTS:
+        leaked = leaked_modules(module)
+        if leaked:
+            raise RuntimeError(f"Importing {module} loads {', '.join(leaked)}; import them lazily")
+        # One interpreter at a time so start-up times do not compete for CPU
+        results.append(measure(
+            f"import {module}",
+            lambda: subprocess.run([sys.executable, "-c", f"import {module}"], check=True),
+            iterations, 1,
+        ))
+    return results
+
+
+SUITES = {
+    "search": bench_search,
+    "browser": bench_browser,
+    "crew": bench_trip_crew,
+    "api": bench_api,
+    "imports": bench_imports,
+}
+
+
+def print_table(results):
+    columns = ["name", "iterations", "concurrency", "p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb"]
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in results:
+        print("  ".join(str(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline VacAIgent benchmarks")
+    parser.add_argument("--suite", choices=["all", *SUITES], default="all")
+    parser.add_argument("--iterations", "-n", type=int, default=20)
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-words", type=int, default=200, help="Words per fake LLM answer")
+    parser.add_argument("--service-latency", type=float, default=0.02, help="Seconds per fake Serper/browserless call")
+    parser.add_argument("--page-paragraphs", type=int, default=200, help="Size of the fake scraped page")
+    parser.add_argument("--cache", action="store_true", help="Keep the search/page caches enabled")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep the Serper/browserless rate limits enabled")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with FakeServices(latency=args.service_latency, page_paragraphs=args.page_paragraphs) as services:
+        # Tool modules read these at import time, so set them before importing anything
+        os.environ["SERPER_URL"] = services.search_url
+        os.environ["BROWSERLESS_URL"] = services.browserless_url
+        for key in ("GEMINI_API_KEY", "SERPER_API_KEY", "BROWSERLESS_API_KEY"):
+            os.environ.setdefault(key, "offline-benchmark")
+        if not args.cache:
+            for prefix in ("SEARCH_CACHE", "PAGE_CACHE", "SUMMARY_CACHE"):
+                os.environ[f"{prefix}_BACKEND"] = "none"
+        if not args.rate_limits:
+            # Otherwise the search/browser suites measure the token bucket, not the tools
+            for provider in ("SERPER", "BROWSERLESS"):
+                os.environ[f"{provider}_QPS"] = "0"
+        # Concurrent identical runs would resume from each other's checkpoints (and write
+        # .cache/checkpoint.sqlite3), so every run does its full work
+        os.environ["CHECKPOINT_BACKEND"] = "none"
+
+        import resources
+        resources.set_llm_factory(fake_llm_factory(args.llm_latency, args.llm_words))
+
+        suites = SUITES if args.suite == "all" else {args.suite: SUITES[args.suite]}
+        results = []
+        for suite in suites.values():
+            outcome = suite(args.iterations, args.concurrency)
+            results.extend(outcome if isinstance(outcome, list) else [outcome])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
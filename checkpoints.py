@@ -0,0 +1,83 @@
+import uuid
+import threading
+from tools.cache import build_cache
+
+# ----------------------------------------------------------------------
+# Per-task checkpoints so a failed or restarted plan resumes from the last
+# completed task instead of paying for every task again.
+# Stored on disk by default (CHECKPOINT_BACKEND=sqlite) so they survive a
+# worker restart; CHECKPOINT_TTL bounds how long a partial run is kept.
+# ----------------------------------------------------------------------
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = build_cache("CHECKPOINT", default_ttl=24 * 3600, default_backend="sqlite") or False
+    return _store or None
+
+
+class CheckpointOutput:
+    """Stand-in for a crewai TaskOutput restored from a checkpoint."""
+
+    def __init__(self, raw: str, name: str = None, agent: str = None):
+        self.raw = raw
+        self.name = name
+        self.agent = agent
+
+    def __str__(self):
+        return self.raw
+
+
+class TaskCheckpoint:
+    """
+    Task outputs of one plan, keyed by the request hash and the task ``output_key``.
+
+    Identical requests share the same entries so a retry resumes where the
+    last attempt stopped. Each entry records the run that last wrote (or
+    resumed from) it, and ``clear`` only removes entries still owned by this
+    run, so a concurrent identical run does not lose the checkpoints it is
+    working from.
+    """
+
+    def __init__(self, run_key: str, store=None):
+        self.run_key = run_key
+        self.run_id = uuid.uuid4().hex
+        self.store = store if store is not None else get_checkpoint_store()
+
+    def _key(self, output_key: str) -> str:
+        return f"{self.run_key}:{output_key}"
+
+    def _write(self, output_key: str, entry: dict):
+        self.store.set(self._key(output_key), {**entry, "run": self.run_id})
+
+    def load(self, output_key: str):
+        """The saved output, taken over by this run; None when there is none."""
+        if self.store is None:
+            return None
+        entry = self.store.get(self._key(output_key))
+        if entry is None:
+            return None
+        self._write(output_key, entry)
+        return CheckpointOutput(entry["raw"], name=entry.get("name"), agent=entry.get("agent"))
+
+    def save(self, output_key: str, output):
+        if self.store is not None:
+            # Name and agent role too, so resumed tasks show up in job partials
+            self._write(output_key, {
+                "raw": getattr(output, "raw", None) or str(output),
+                "name": getattr(output, "name", None),
+                "agent": getattr(output, "agent", None),
+            })
+
+    def clear(self, output_keys):
+        if self.store is None:
+            return
+        for output_key in output_keys:
+            entry = self.store.get(self._key(output_key))
+            if entry is not None and entry.get("run") == self.run_id:
+                self.store.delete(self._key(output_key))
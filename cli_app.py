@@ -1,10 +1,12 @@
-from crewai import Crew, LLM
+from crewai import Crew
 from trip_agents2 import TripAgents
 from trip_tasks import TripTasks
+from resources import get_router_llm
+from dag import CREW_EXECUTOR, build_trip_graph, graph_workers, run_dag, single_city
+from checkpoints import TaskCheckpoint
+from coalesce import request_key
 from datetime import datetime, timedelta
 import argparse
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
 import os
 from dotenv import load_dotenv
 from textwrap import dedent
@@ -17,7 +19,10 @@ class TripCrew:
         self.interests = interests
         self.date_range = date_range
         #self.llm = LLM(model="groq/deepseek-r1-distill-llama-70b")
-        self.llm = LLM(model="gemini/gemini-2.0-flash")
+        self.llm = get_router_llm("gemini/gemini-2.0-flash")
+        self.checkpoint = TaskCheckpoint(request_key(
+            origin=origin, cities=cities, date_range=date_range, interests=interests
+        ))
 
 
     def run(self):
@@ -25,6 +30,14 @@ class TripCrew:
             agents = TripAgents(llm=self.llm)
             tasks = TripTasks()
 
+            if CREW_EXECUTOR == "dag":
+                graph = build_trip_graph(
+                    agents, tasks, self.origin, self.cities, self.interests, self.date_range
+                )
+                outputs = run_dag(graph, max_workers=graph_workers(graph), checkpoint=self.checkpoint)
+                self.checkpoint.clear([node.key for node in graph])
+                return outputs["final_itinerary"].raw
+
             city_selector_agent = agents.city_selection_agent()
             local_expert_agent = agents.local_expert()
             travel_concierge_agent = agents.travel_concierge()
@@ -41,7 +54,8 @@ class TripCrew:
                 local_expert_agent,
                 self.origin,
                 self.interests,
-                self.date_range
+                self.date_range,
+                city=single_city(self.cities)
             )
 
             plan_task = tasks.plan_task(
@@ -93,7 +107,7 @@ def main():
     parser.add_argument('--destination', '-d', 
                        type=str, 
                        required=True,
-                       help='Destination city and country (e.g., "Bali, Indonesia")')
+                       help='Destination city and country (e.g., "Bali, Indonesia"); separate several candidates with ";"')
     
     parser.add_argument('--start-date', '-s',
                        type=validate_date,
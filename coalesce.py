@@ -0,0 +1,57 @@
+import json
+import asyncio
+from tools.cache import content_hash, normalize_query
+
+
+def request_key(**fields) -> str:
+    """Stable key for a request: string fields are case/whitespace-normalized."""
+    normalized = {
+        name: normalize_query(value) if isinstance(value, str) else str(value)
+        for name, value in fields.items()
+    }
+    return content_hash(json.dumps(normalized, sort_keys=True))
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical requests into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    in flight await the same result. Successful results can optionally be
+    kept in a short-TTL cache so requests arriving just after also reuse them.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self._inflight = {}
+
+    async def do(self, key: str, func):
+        """Return the result of ``await func()``, shared by every caller with ``key``."""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(self._execute(key, func))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A caller that disconnects must not cancel the work the others are awaiting
+        return await asyncio.shield(task)
+
+    async def _execute(self, key: str, func):
+        result = await func()
+        if self.cache is not None:
+            self.cache.set(key, result)
+        return result
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
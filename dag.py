@@ -0,0 +1,186 @@
+import os
+import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from usage import task_scope
+from task_context import handoff
+
+# ----------------------------------------------------------------------
+# Dependency-aware task execution.
+#
+# crewai's sequential Crew runs tasks strictly one after another. Here each
+# task starts as soon as the tasks it depends on have finished, so
+# independent research runs concurrently and only the tasks that really
+# need earlier results wait for them.
+# ----------------------------------------------------------------------
+CREW_EXECUTOR = os.getenv("CREW_EXECUTOR", "dag").lower()
+DAG_MAX_WORKERS = int(os.getenv("DAG_MAX_WORKERS", 3))
+CITY_FANOUT_CONCURRENCY = int(os.getenv("CITY_FANOUT_CONCURRENCY", 5))
+FANOUT_PREFIX = "city:"
+# Outputs handed to plan_task as a condensed brief when compression is on
+COMPRESSED_OUTPUTS = ("chosen_city", "city_guide")
+
+
+class DAGNode:
+    """
+    One task in the graph.
+
+    With ``compress``, dependents receive a condensed brief of this task's
+    output instead of the full text (see task_context.py).
+    """
+
+    def __init__(self, key: str, task, depends_on=(), compress: bool = False):
+        self.key = key
+        self.task = task
+        self.depends_on = list(depends_on)
+        self.compress = compress
+
+
+def _context(node: DAGNode, handoffs: dict) -> str:
+    return "\n\n".join(f"## {key}\n{handoffs[key]}" for key in node.depends_on)
+
+
+def _execute(node: DAGNode, handoffs: dict):
+    context = _context(node, handoffs)
+    with task_scope(node.key, getattr(node.task.agent, "role", None)):
+        output = node.task.execute_sync(agent=node.task.agent, context=context or None)
+    # Condensed in this worker, overlapping with tasks still running elsewhere
+    return output, handoff(node.key, output, node.compress)
+
+
+def run_dag(nodes, max_workers: int = None, on_task_done=None, checkpoint=None, initializer=None,
+            fanout_limit: int = None) -> dict:
+    """
+    Execute ``nodes`` honoring ``depends_on`` and return ``{key: TaskOutput}``.
+
+    At most ``fanout_limit`` (default CITY_FANOUT_CONCURRENCY) city sub-tasks
+    run at once, whatever the pool size, so the other workers stay free for
+    the rest of the graph.
+
+    Outputs of dependencies are handed to a task as its context.
+    ``on_task_done(output)`` is called after every task, like crewai's
+    ``task_callback``. With a ``TaskCheckpoint``, tasks that already have a
+    saved output are not executed again and new outputs are saved as they
+    complete. ``initializer`` runs once in every worker thread.
+    """
+    by_key = {node.key: node for node in nodes}
+    for node in nodes:
+        missing = [key for key in node.depends_on if key not in by_key]
+        if missing:
+            raise ValueError(f"Task '{node.key}' depends on unknown tasks: {', '.join(missing)}")
+
+    outputs = {}
+    handoffs = {}
+    pending = list(nodes)
+    running = {}
+    if checkpoint is not None:
+        for node in list(pending):
+            saved = checkpoint.load(node.key)
+            if saved is not None:
+                outputs[node.key] = saved
+                handoffs[node.key] = handoff(node.key, saved, node.compress)
+                pending.remove(node)
+                if on_task_done is not None:
+                    on_task_done(saved)
+
+    fanout_limit = fanout_limit or CITY_FANOUT_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=max_workers or DAG_MAX_WORKERS, initializer=initializer) as pool:
+        while pending or running:
+            ready = [node for node in pending if all(key in outputs for key in node.depends_on)]
+            if not ready and not running:
+                raise ValueError("Task dependencies contain a cycle")
+            fanout_running = sum(1 for node in running.values() if node.key.startswith(FANOUT_PREFIX))
+            for node in ready:
+                if node.key.startswith(FANOUT_PREFIX):
+                    # Submitted later, when a running city sub-task frees a slot
+                    if fanout_running >= fanout_limit:
+                        continue
+                    fanout_running += 1
+                pending.remove(node)
+                # Workers inherit the caller's context (progress listeners, usage tags)
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, _execute, node, dict(handoffs))] = node
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            error = None
+            for future in done:
+                node = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                outputs[node.key], handoffs[node.key] = future.result()
+                if checkpoint is not None:
+                    checkpoint.save(node.key, outputs[node.key])
+                if on_task_done is not None:
+                    on_task_done(outputs[node.key])
+            # Siblings that finished together are checkpointed before giving up
+            if error is not None:
+                raise error
+    return outputs
+
+
+def split_cities(cities: str):
+    """
+    Split a list of candidate cities.
+
+    Cities are written as "City, Country", so commas cannot separate them;
+    candidates are separated by ";", "|" or new lines instead.
+    """
+    parts = re.split(r"[;|\n]", cities or "")
+    return [part.strip() for part in parts if part.strip()]
+
+
+def single_city(cities: str):
+    """The destination when exactly one candidate is given, else None (picked by identify_task)."""
+    candidates = split_cities(cities)
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def task_nodes(task_list, compressed=COMPRESSED_OUTPUTS):
+    """Graph nodes for tasks that declare ``output_key`` and ``depends_on`` (see trip_tasks.TripTask)."""
+    return [
+        DAGNode(task.output_key, task, task.depends_on, compress=task.output_key in compressed)
+        for task in task_list
+    ]
+
+
+def build_trip_graph(agents, tasks, origin, cities, interests, date_range):
+    """
+    Build the task graph for one trip plan.
+
+    - One destination: the local-expert guide does not need the
+      city-selection verdict, so it runs alongside identify_task.
+    - Several candidates: every city is researched in its own sub-task
+      concurrently, then a ranking task compares the structured results.
+
+    Edges come from each task's ``depends_on``. The city report and guide
+    are in COMPRESSED_OUTPUTS so that, with TASK_CONTEXT_COMPRESSION=llm,
+    plan_task gets a condensed brief of them.
+    """
+    candidates = split_cities(cities)
+
+    if len(candidates) > 1:
+        task_list = [
+            tasks.city_research_task(agents.city_selection_agent(), origin, city, interests, date_range)
+            for city in candidates
+        ]
+        task_list.append(tasks.rank_task(agents.city_selection_agent(), origin, cities, interests, date_range))
+        task_list.append(tasks.gather_task(agents.local_expert(), origin, interests, date_range))
+    else:
+        task_list = [
+            tasks.identify_task(agents.city_selection_agent(), origin, cities, interests, date_range),
+            tasks.gather_task(agents.local_expert(), origin, interests, date_range, city=cities),
+        ]
+
+    task_list.append(tasks.plan_task(agents.travel_concierge(), origin, interests, date_range))
+    return task_nodes(task_list)
+
+
+def graph_workers(nodes) -> int:
+    """
+    Pool size for a graph: DAG_MAX_WORKERS, or more when there are city
+    sub-tasks to fan out. run_dag separately caps the running city
+    sub-tasks at CITY_FANOUT_CONCURRENCY.
+    """
+    fanout = sum(1 for node in nodes if node.key.startswith(FANOUT_PREFIX))
+    return max(DAG_MAX_WORKERS, min(fanout, CITY_FANOUT_CONCURRENCY))
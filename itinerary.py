@@ -0,0 +1,261 @@
+import re
+from typing import List, Optional
+from pydantic import BaseModel
+from llm_router import forward_stream_chunk
+from tools import events
+from usage import current_task
+
+# ----------------------------------------------------------------------
+# Structured itinerary parsed from the concierge's Markdown.
+#
+# ItineraryParser consumes the answer line by line as it streams, so a
+# day becomes available as soon as the next heading starts, while later
+# days are still being generated.
+# ----------------------------------------------------------------------
+
+
+class Activity(BaseModel):
+    time_of_day: Optional[str] = None
+    description: str
+    cost: Optional[str] = None
+
+
+class Day(BaseModel):
+    day: int
+    title: str = ""
+    weather: Optional[str] = None
+    activities: List[Activity] = []
+    estimated_cost: Optional[str] = None
+
+
+class Hotel(BaseModel):
+    name: str
+    details: str = ""
+    nightly_rate: Optional[str] = None
+
+
+class CostItem(BaseModel):
+    item: str
+    amount: Optional[str] = None
+
+
+class Itinerary(BaseModel):
+    days: List[Day] = []
+    hotels: List[Hotel] = []
+    costs: List[CostItem] = []
+    packing_list: List[str] = []
+    total_cost: Optional[str] = None
+    complete: bool = False
+
+    def subset(self, days=None, sections=None) -> dict:
+        """Only the requested day numbers and sections (days, hotels, costs, packing_list)."""
+        data = self.model_dump()
+        if days is not None:
+            data["days"] = [day for day in data["days"] if day["day"] in days]
+        if sections is not None:
+            keep = set(sections) | {"complete"}
+            if "costs" in keep:
+                keep.add("total_cost")
+            data = {key: value for key, value in data.items() if key in keep}
+        return data
+
+
+SECTIONS = {
+    "hotels": re.compile(r"accommodation|hotel|where to stay", re.I),
+    "packing_list": re.compile(r"packing|what to pack", re.I),
+    "costs": re.compile(r"budget|cost breakdown", re.I),
+}
+HEADING = re.compile(r"^\s*(#{1,6})\s*(.+?)\s*#*\s*$")
+DAY_HEADING = re.compile(r"^[^\w]*\**\s*day\s+(\d+)\b\**\s*[:\-–—.]?\s*(.*)$", re.I)
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+TABLE_ROW = re.compile(r"^\s*\|(.+)\|\s*$")
+PRICE = re.compile(r"(?:[$€£₹฿]|USD|EUR|INR|THB)\s?\d[\d,]*(?:\.\d+)?(?:\s?[-–]\s?[$€£₹฿]?\d[\d,]*(?:\.\d+)?)?|\d[\d,]*(?:\.\d+)?\s?(?:USD|EUR|INR|THB)", re.I)
+TIME_OF_DAY = re.compile(r"^\**\s*(early morning|morning|late morning|midday|noon|afternoon|evening|night|late night|lunch|dinner|breakfast)\b\**\s*[:\-–—]?\s*\**\s*", re.I)
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\*\*|__|`", "", text).strip(" :-–—\t")
+
+
+def _price(text: str):
+    match = PRICE.search(text)
+    return match.group(0).strip() if match else None
+
+
+class ItineraryParser:
+    """Incremental Markdown -> Itinerary parser; ``feed`` returns days that just completed."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._section = None
+        self._day = None
+        self._days = []
+        self._hotels = []
+        self._costs = []
+        self._packing = []
+        self._total = None
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        completed = []
+        for line in lines:
+            day = self._line(line)
+            if day is not None:
+                completed.append(day)
+        return completed
+
+    def finish(self) -> Itinerary:
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        self._close_day()
+        return self.snapshot(complete=True)
+
+    def snapshot(self, complete: bool = False) -> Itinerary:
+        """Everything parsed so far; the day still being written is left out."""
+        return Itinerary(
+            days=[Day(**day) for day in self._days],
+            hotels=[Hotel(**hotel) for hotel in self._hotels],
+            costs=[CostItem(**cost) for cost in self._costs],
+            packing_list=list(self._packing),
+            total_cost=self._total,
+            complete=complete,
+        )
+
+    def _close_day(self):
+        if self._day is None:
+            return None
+        day, self._day = self._day, None
+        self._days.append(day)
+        return Day(**day)
+
+    def _line(self, line: str):
+        heading = HEADING.match(line)
+        day_match = DAY_HEADING.match(_clean(heading.group(2)) if heading else _clean(line))
+        # "Day 2" starts a day when it is a heading or a bold line of its own
+        if day_match and (heading or line.strip().startswith("**")):
+            finished = self._close_day()
+            self._section = "days"
+            self._day = {"day": int(day_match.group(1)), "title": _clean(day_match.group(2)), "activities": []}
+            return finished
+        if heading:
+            finished = self._close_day()
+            title = _clean(heading.group(2))
+            self._section = next((name for name, pattern in SECTIONS.items() if pattern.search(title)), None)
+            return finished
+
+        text = line.strip()
+        if not text or set(text) <= set("|-: "):
+            return None
+        if self._day is not None:
+            self._day_line(text)
+        elif self._section == "hotels":
+            self._hotel_line(text)
+        elif self._section == "packing_list":
+            bullet = BULLET.match(text)
+            if bullet:
+                self._packing.append(_clean(bullet.group(1)))
+        elif self._section == "costs":
+            self._cost_line(text)
+        return None
+
+    def _day_line(self, text: str):
+        bullet = BULLET.match(text)
+        body = _clean(bullet.group(1) if bullet else text)
+        lowered = body.lower()
+        if lowered.startswith("weather"):
+            self._day["weather"] = _clean(body[len("weather"):])
+        elif "total" in lowered or lowered.startswith(("estimated cost", "daily cost", "cost")):
+            self._day["estimated_cost"] = _price(body) or _clean(body.split(":", 1)[-1])
+        elif bullet or TIME_OF_DAY.match(body):
+            time_match = TIME_OF_DAY.match(body)
+            self._day["activities"].append({
+                "time_of_day": time_match.group(1).lower() if time_match else None,
+                "description": _clean(body[time_match.end():] if time_match else body),
+                "cost": _price(body),
+            })
+
+    def _hotel_line(self, text: str):
+        row = TABLE_ROW.match(text)
+        if row:
+            cells = [_clean(cell) for cell in row.group(1).split("|")]
+            if cells and cells[0] and cells[0].lower() not in ("hotel", "name", "property"):
+                self._hotels.append({"name": cells[0], "details": " | ".join(cells[1:]),
+                                     "nightly_rate": _price(text)})
+            return
+        bullet = BULLET.match(text)
+        if not bullet:
+            return
+        body = bullet.group(1)
+        bold = re.match(r"\*\*(.+?)\*\*\s*[:\-–—]?\s*(.*)", body)
+        name, details = (bold.group(1), bold.group(2)) if bold else (re.split(r"[:\-–—]", body, maxsplit=1) + [""])[:2]
+        self._hotels.append({"name": _clean(name), "details": _clean(details), "nightly_rate": _price(body)})
+
+    def _cost_line(self, text: str):
+        row = TABLE_ROW.match(text)
+        if row:
+            cells = [_clean(cell) for cell in row.group(1).split("|")]
+            item, amount = cells[0], _price(text)
+        else:
+            bullet = BULLET.match(text)
+            if not bullet:
+                return
+            item, amount = _clean(re.split(r"[:(]", bullet.group(1), maxsplit=1)[0]), _price(bullet.group(1))
+        if not item or amount is None:
+            return
+        if "total" in item.lower():
+            self._total = amount
+        else:
+            self._costs.append({"item": item, "amount": amount})
+
+
+def parse_itinerary(markdown: str) -> Itinerary:
+    parser = ItineraryParser()
+    parser.feed(markdown)
+    return parser.finish()
+
+
+class StreamingItinerary:
+    """
+    Follow the final task's streamed answer and keep the latest snapshot.
+
+    Use as an events listener around a crew run. Each LLM call of the
+    concierge gets a fresh parser; the snapshot is only replaced once the
+    new call has produced at least one day, so tool-use turns never blank it.
+    """
+
+    def __init__(self, task_key: str = "final_itinerary", on_update=None):
+        self.task_key = task_key
+        self.on_update = on_update
+        self.parser = ItineraryParser()
+        self.itinerary = None
+
+    def __call__(self, event):
+        if event["type"] == "llm_stream_chunk" and event.get("task") == self.task_key:
+            if self.parser.feed(event["chunk"]):
+                self.itinerary = self.parser.snapshot()
+                if self.on_update is not None:
+                    self.on_update(self.itinerary)
+        elif event["type"] == "llm_call" and current_task() == self.task_key and not event.get("superseded"):
+            self.parser = ItineraryParser()
+
+
+def _bridge_crewai_stream():
+    """Re-emit crewai's LLM stream chunks as ``llm_stream_chunk`` events, tagged with the task."""
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+        except ImportError:
+            return
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _on_chunk(source, event):
+        # Of two hedged calls, only the one whose answer is used is streamed
+        if forward_stream_chunk():
+            events.emit("llm_stream_chunk", chunk=event.chunk, task=current_task())
+
+
+_bridge_crewai_stream()
@@ -0,0 +1,119 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------------
+# Background job queue for long-running crew executions.
+# ----------------------------------------------------------------------
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", 20))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 3600))
+
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the waiting queue is full."""
+
+
+class Job:
+    def __init__(self, job_id: str, params: dict = None):
+        self.id = job_id
+        self.params = params or {}
+        self.status = "queued"
+        self.partial = []
+        self.result = None
+        self.usage = None
+        # Structured itinerary, filled in day by day while the plan is written
+        self.itinerary = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def add_partial(self, name: str, output: str):
+        self.partial.append({"task": name, "output": output})
+
+    def as_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "partial": list(self.partial),
+            "itinerary": self.result,
+            "usage": self.usage,
+            "days_ready": len(self.itinerary.days) if self.itinerary is not None else 0,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their state in memory.
+
+    At most ``concurrency`` jobs run at once and at most ``queue_depth`` wait
+    behind them; anything beyond that is rejected with ``QueueFullError``.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, queue_depth: int = JOB_QUEUE_DEPTH,
+                 result_ttl: float = JOB_RESULT_TTL):
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crew-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, params: dict = None) -> Job:
+        """Queue ``func(job)``; its return value becomes the job result."""
+        with self._lock:
+            self._expire()
+            if self.active_count() >= self.concurrency + self.queue_depth:
+                raise QueueFullError("Too many trip plans in progress, please retry shortly")
+            job = Job(uuid.uuid4().hex, params)
+            self._jobs[job.id] = job
+        self._executor.submit(self._execute, job, func)
+        return job
+
+    def get(self, job_id: str):
+        # Expired results are dropped on read too, not only when the next job is submitted
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def active_count(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status in ("queued", "running"))
+
+    def queued_count(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status == "queued")
+
+    def running_count(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if job.status == "running")
+
+    def _execute(self, job: Job, func):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = func(job)
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._expire()
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,324 @@
+import os
+import copy
+import time
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError, wait
+from crewai.llms.base_llm import BaseLLM
+from tools import events
+from usage import estimate_cost, estimate_tokens
+
+# ----------------------------------------------------------------------
+# Per-call provider routing: failover, hedged requests and circuit breaking.
+#
+# Instead of re-running a whole crew when the primary provider fails, every
+# single LLM call falls back to the next provider, a slow primary call is
+# hedged with a backup request, and a provider that keeps failing is
+# skipped for a cool-down period.
+# ----------------------------------------------------------------------
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURES", 5))
+CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", 60))
+
+HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", 16))
+# Distinct stop-word lists kept as client copies per provider (least recently used dropped)
+STOP_VARIANTS_MAX = 16
+
+_hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+# Losing hedged calls cannot be interrupted and finish in the pool; hedging is
+# skipped while every slot is taken instead of queueing behind them
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+_race = contextvars.ContextVar("llm_hedge_race", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Every provider is cooling down or already has its trial call in flight."""
+
+
+class HedgeRace:
+    """
+    The primary and backup call of one hedged request.
+
+    The first call to stream a chunk, or else the first to succeed, owns the
+    answer; streamed chunks of the other call are dropped.
+    """
+
+    def __init__(self):
+        self.owner = None
+        self._lock = threading.Lock()
+
+    def claim(self, label: str) -> bool:
+        with self._lock:
+            if self.owner is None:
+                self.owner = label
+            return self.owner == label
+
+    def hand_over(self, label: str):
+        with self._lock:
+            self.owner = label
+
+
+def forward_stream_chunk() -> bool:
+    """Whether a chunk streamed by the current LLM call belongs to the answer being used."""
+    gate = _race.get()
+    return gate is None or gate[0].claim(gate[1])
+
+
+def _superseded() -> bool:
+    gate = _race.get()
+    return gate is not None and gate[0].owner not in (None, gate[1])
+
+
+def _metered(llm):
+    """
+    A shallow copy of ``llm`` with its own token counters.
+
+    crewai LLMs add the usage each provider response reports to
+    ``_token_usage``; pooled clients are shared by concurrent crews, so a
+    per-call copy is what ties that usage to this call.
+    """
+    usage = getattr(llm, "_token_usage", None)
+    if not isinstance(usage, dict):
+        return llm
+    metered = copy.copy(llm)
+    metered._token_usage = dict.fromkeys(usage, 0)
+    return metered
+
+
+def _reported_usage(llm):
+    """(prompt, completion) tokens reported by the provider, or None when it reported none."""
+    usage = getattr(llm, "_token_usage", None)
+    if not isinstance(usage, dict) or not (usage.get("prompt_tokens") or usage.get("completion_tokens")):
+        return None
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _raced(race: HedgeRace, label: str, provider, stop, args, kwargs):
+    _race.set((race, label))
+    try:
+        return provider.call(stop, *args, **kwargs)
+    finally:
+        _hedge_slots.release()
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through after the cool-down."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Admit a call; in half-open state only the first caller gets through until it resolves."""
+        with self._lock:
+            state = self.state
+            if state == "half_open":
+                if self.probing:
+                    return False
+                self.probing = True
+            return state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+
+class Provider:
+    def __init__(self, llm):
+        self.llm = llm
+        self.name = llm.model
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=200)
+        self.calls = 0
+        self.errors = 0
+        self._stop_variants = OrderedDict()
+        self._stop_lock = threading.Lock()
+
+    def hedge_delay(self):
+        """Latency percentile after which a backup request is fired, once enough samples exist."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE / 100))
+        return ordered[index]
+
+    def _llm_for(self, stop):
+        """
+        The pooled client, or a shallow copy of it carrying ``stop``.
+
+        The pooled client is shared by every crew, so stop words are never
+        set on it; each distinct stop list gets its own copy.
+        """
+        if not stop or list(getattr(self.llm, "stop", None) or []) == list(stop):
+            return self.llm
+        key = tuple(str(word) for word in stop)
+        # Shared by concurrent crew and hedge threads
+        with self._stop_lock:
+            llm = self._stop_variants.get(key)
+            if llm is None:
+                llm = copy.copy(self.llm)
+                llm.stop = list(key)
+                self._stop_variants[key] = llm
+                if len(self._stop_variants) > STOP_VARIANTS_MAX:
+                    self._stop_variants.popitem(last=False)
+            else:
+                self._stop_variants.move_to_end(key)
+        return llm
+
+    def call(self, stop, *args, **kwargs):
+        llm = _metered(self._llm_for(stop))
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            result = llm.call(*args, **kwargs)
+        except Exception as e:
+            self.errors += 1
+            self.breaker.record_failure()
+            events.emit("llm_call", model=self.name, error=str(e), superseded=_superseded(),
+                        latency_ms=round((time.perf_counter() - start) * 1000, 1))
+            raise
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        self.breaker.record_success()
+
+        reported = _reported_usage(llm)
+        if reported is not None:
+            prompt_tokens, completion_tokens = reported
+        else:
+            messages = args[0] if args else kwargs.get("messages")
+            prompt_tokens = estimate_tokens(self.name, messages)
+            completion_tokens = estimate_tokens(self.name, str(result))
+        # A hedged call that lost the race still cost tokens; ``superseded`` marks it
+        events.emit("llm_call", model=self.name, prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens, tokens_estimated=reported is None,
+                    latency_ms=round(latency * 1000, 1),
+                    cost_usd=estimate_cost(self.name, prompt_tokens, completion_tokens),
+                    superseded=_superseded())
+        return result
+
+    def stats(self):
+        return {
+            "provider": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "circuit": self.breaker.state,
+            "hedge_after_s": self.hedge_delay(),
+        }
+
+
+class RouterLLM(BaseLLM):
+    """crewai LLM that routes each call across an ordered list of providers."""
+
+    def __init__(self, llms, hedge: bool = HEDGE_ENABLED):
+        if not llms:
+            raise ValueError("RouterLLM needs at least one provider")
+        super().__init__(model=llms[0].model)
+        self.providers = [Provider(llm) for llm in llms]
+        self.hedge = hedge
+        self.hedged_calls = 0
+
+    def _stop(self):
+        # crewai >= 1.x scopes the agent's stop words to the call (stop_sequences)
+        return getattr(self, "stop_sequences", None) or getattr(self, "stop", None)
+
+    def _hedged(self, primary, backups, admit, stop, *args, **kwargs):
+        delay = primary.hedge_delay() if self.hedge and backups else None
+        if delay is None or not _hedge_slots.acquire(blocking=False):
+            return primary.call(stop, *args, **kwargs)
+
+        race = HedgeRace()
+        # Copy the caller's context so usage/progress tags follow the call
+        calls = {_hedge_pool.submit(contextvars.copy_context().run, _raced, race, "primary",
+                                    primary, stop, args, kwargs): "primary"}
+        try:
+            return next(iter(calls)).result(timeout=delay)
+        except TimeoutError:
+            pass
+
+        # A primary that already streams is slow, not stuck; hedging it would only add cost
+        if race.owner is None and _hedge_slots.acquire(blocking=False):
+            backup = next((provider for provider in backups if admit(provider)), None)
+            if backup is None:
+                _hedge_slots.release()
+            else:
+                self.hedged_calls += 1
+                calls[_hedge_pool.submit(contextvars.copy_context().run, _raced, race, "backup",
+                                         backup, stop, args, kwargs)] = "backup"
+
+        results, errors = {}, {}
+        pending = set(calls)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    results[calls[future]] = future.result()
+                else:
+                    errors[calls[future]] = future.exception()
+            # The call whose chunks were streamed owns the answer; otherwise the first success
+            # wins. The other call is left to finish in the pool and its result is ignored.
+            if race.owner in errors:
+                survivor = next((label for label in calls.values() if label not in errors), None)
+                if survivor is not None:
+                    race.hand_over(survivor)
+            for label, result in results.items():
+                if race.claim(label):
+                    return result
+        raise errors.get(race.owner) or next(iter(errors.values()))
+
+    def call(self, *args, **kwargs):
+        stop = self._stop()
+        candidates = [provider for provider in self.providers if provider.breaker.state != "open"]
+        # With every circuit open, trying is still better than failing outright
+        forced = not candidates
+        candidates = candidates or self.providers
+
+        def admit(provider):
+            return forced or provider.breaker.allow()
+
+        error = None
+        for index, provider in enumerate(candidates):
+            if not admit(provider):
+                # Half-open with its single trial call already in flight
+                continue
+            try:
+                return self._hedged(provider, candidates[index + 1:], admit, stop, *args, **kwargs)
+            except Exception as e:
+                error = e
+        raise error or CircuitOpenError("Every LLM provider is cooling down, retry shortly")
+
+    def supports_function_calling(self) -> bool:
+        return all(getattr(p.llm, "supports_function_calling", lambda: False)() for p in self.providers)
+
+    def supports_stop_words(self) -> bool:
+        return all(getattr(p.llm, "supports_stop_words", lambda: True)() for p in self.providers)
+
+    def get_context_window_size(self) -> int:
+        return min(p.llm.get_context_window_size() for p in self.providers)
+
+    def stats(self):
+        return {"hedged_calls": self.hedged_calls, "providers": [p.stats() for p in self.providers]}
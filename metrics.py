@@ -0,0 +1,248 @@
+import time
+import weakref
+import threading
+from tools import events
+from tools.cache import cache_stats
+from tools.rate_limit import queue_depths
+
+# ----------------------------------------------------------------------
+# Prometheus text-format metrics without extra dependencies.
+#
+# Counters and histograms write into per-thread shards, so recording a
+# value never takes a lock; shards are only summed when /metrics is
+# scraped, and the shard of a finished thread is folded into a base shard
+# so short-lived worker threads do not pile up. Gauges are computed by
+# callbacks at scrape time.
+# ----------------------------------------------------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _ThreadToken:
+    """Held in a thread's locals only; it is collected when the thread exits."""
+
+
+class _Sharded:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}
+        # Totals of threads that have exited
+        self._base = {}
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            token = _ThreadToken()
+            # Only taken once per thread, never on the hot path
+            with self._register_lock:
+                self._shards[id(shard)] = shard
+            self._local.shard = shard
+            self._local.token = token
+            weakref.finalize(token, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: dict):
+        # The owning thread is gone, so nothing writes to ``shard`` any more
+        with self._register_lock:
+            self._shards.pop(id(shard), None)
+            for key, value in shard.items():
+                self._merge(self._base, key, value)
+
+    def _merge(self, into: dict, key, value):
+        raise NotImplementedError
+
+    def _snapshot(self):
+        with self._register_lock:
+            shards = list(self._shards.values())
+            base = [(key, list(value) if isinstance(value, list) else value) for key, value in self._base.items()]
+        yield base
+        for shard in shards:
+            while True:
+                try:
+                    yield list(shard.items())
+                    break
+                except RuntimeError:
+                    # The owning thread resized the dict mid-copy; try again
+                    continue
+
+
+class Counter(_Sharded):
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, into: dict, key, value):
+        into[key] = into.get(key, 0) + value
+
+    def collect(self):
+        totals = {}
+        for items in self._snapshot():
+            for key, value in items:
+                self._merge(totals, key, value)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(totals.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram(_Sharded):
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        series = shard.get(key)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def _merge(self, into: dict, key, series):
+        merged = into.setdefault(key, [0] * len(series))
+        for i, value in enumerate(list(series)):
+            merged[i] += value
+
+    def collect(self):
+        totals = {}
+        for items in self._snapshot():
+            for key, series in items:
+                self._merge(totals, key, series)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (str(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value(s) computed at scrape time; ``func`` returns a number or ``{label_value: number}``."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, func, label: str = None):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.label = label
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.func()
+        if isinstance(value, dict):
+            for label_value, number in sorted(value.items()):
+                lines.append(f"{self.name}{_labels((self.label,), (label_value,))} {number}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """A monotonic total kept elsewhere (e.g. by the caches) and read at scrape time."""
+
+    kind = "counter"
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def exposition(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception:
+                # One broken gauge callback must not hide the other metrics
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "vacaigent_http_requests_total", "HTTP requests by method, route and status", ("method", "path", "status")))
+http_latency = registry.register(Histogram(
+    "vacaigent_http_request_duration_seconds", "HTTP request latency by route", ("method", "path")))
+tool_latency = registry.register(Histogram(
+    "vacaigent_tool_call_duration_seconds", "Tool call latency by provider", ("provider", "tool")))
+tool_wait = registry.register(Histogram(
+    "vacaigent_tool_queue_wait_seconds", "Time tool calls waited for a rate-limit token", ("provider",)))
+registry.register(Gauge(
+    "vacaigent_tool_queue_depth", "Tool calls waiting for a rate-limit token", queue_depths, label="provider"))
+page_bytes = registry.register(Counter(
+    "vacaigent_page_bytes_in_total", "HTML bytes read from scraped pages"))
+page_chars = registry.register(Counter(
+    "vacaigent_page_chars_kept_total", "Characters of content kept from scraped pages"))
+llm_calls = registry.register(Counter(
+    "vacaigent_llm_calls_total", "LLM calls by model and outcome", ("model", "outcome")))
+llm_latency = registry.register(Histogram(
+    "vacaigent_llm_call_duration_seconds", "LLM call latency by model", ("model",)))
+registry.register(Gauge(
+    "vacaigent_cache_hit_ratio", "Hit ratio of each named cache since startup",
+    lambda: {name: stats["hit_ratio"] for name, stats in cache_stats().items()}, label="cache"))
+registry.register(CallbackCounter(
+    "vacaigent_cache_hits_total", "Hits of each named cache since startup",
+    lambda: {name: stats["hits"] for name, stats in cache_stats().items()}, label="cache"))
+registry.register(CallbackCounter(
+    "vacaigent_cache_misses_total", "Misses of each named cache since startup",
+    lambda: {name: stats["misses"] for name, stats in cache_stats().items()}, label="cache"))
+
+
+def _record(event):
+    if event["type"] == "tool_finished":
+        tool_latency.observe(event.get("latency_ms", 0) / 1000,
+                             provider=event.get("provider") or "local", tool=event.get("tool"))
+    elif event["type"] == "tool_queued":
+        tool_wait.observe(event.get("wait_ms", 0) / 1000, provider=event.get("provider"))
+    elif event["type"] == "page_extracted":
+        page_bytes.inc(event.get("bytes_in", 0))
+        page_chars.inc(event.get("chars_kept", 0))
+    elif event["type"] == "llm_call":
+        llm_calls.inc(model=event.get("model"), outcome="error" if event.get("error") else "success")
+        llm_latency.observe(event.get("latency_ms", 0) / 1000, model=event.get("model"))
+
+
+events.subscribe(_record)
+
+
+def observe_request(method: str, path: str, status: int, started: float):
+    http_requests.inc(method=method, path=path, status=status)
+    http_latency.observe(time.perf_counter() - started, method=method, path=path)
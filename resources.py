@@ -0,0 +1,90 @@
+import os
+import threading
+from crewai import LLM
+from llm_router import RouterLLM
+from tools.cache import content_hash
+
+# ----------------------------------------------------------------------
+# Process-wide pool of LLM clients and tool instances.
+#
+# LLM clients are stateless between calls, so one instance is shared by
+# every concurrent crew. Tools are built once and handed out as shallow
+# per-crew copies, so crewai's usage counters are not shared. Agents are NOT
+# pooled: they hold per-run executor state and stay cheap to build per
+# request.
+# ----------------------------------------------------------------------
+FALLBACK_MODELS = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "gpt-5-mini").split(",") if m.strip()]
+
+_llms = {}
+_routers = {}
+_tools = {}
+_lock = threading.Lock()
+_llm_factory = LLM
+
+
+def _pool_key(name, settings: dict):
+    # Settings can carry API keys; only their hash is kept in the pool keys
+    return name, content_hash(repr(sorted(settings.items(), key=lambda item: item[0])))
+
+
+def set_llm_factory(factory):
+    """
+    Replace how LLM clients are built (e.g. with an offline fake for benchmarks).
+
+    ``factory`` is called as ``factory(model=..., **kwargs)``. Already pooled
+    clients are dropped so the next ``get_llm`` uses the new factory.
+    """
+    global _llm_factory
+    with _lock:
+        _llm_factory = factory
+        _llms.clear()
+        _routers.clear()
+
+
+def get_llm(model: str, **kwargs) -> LLM:
+    """Return the shared LLM client for ``model`` and these settings."""
+    key = _pool_key(model, kwargs)
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = _llm_factory(model=model, **kwargs)
+                _llms[key] = llm
+    return llm
+
+
+def get_router_llm(model: str, **kwargs) -> RouterLLM:
+    """
+    Return the shared router for ``model`` followed by LLM_FALLBACK_MODELS.
+
+    ``kwargs`` (e.g. an explicit api_key) only apply to the primary model;
+    fallback providers read their keys from the environment.
+    """
+    key = _pool_key(model, kwargs)
+    router = _routers.get(key)
+    if router is None:
+        members = [get_llm(model, **kwargs)] + [get_llm(m) for m in FALLBACK_MODELS if m != model]
+        with _lock:
+            router = _routers.setdefault(key, RouterLLM(members))
+    return router
+
+
+def shared_tool(tool_class, **settings):
+    """
+    Return a tool of ``tool_class`` with these settings for one crew.
+
+    The instance is built and validated once; each call returns a shallow
+    copy of it, so per-crew state such as crewai's usage count stays with
+    the crew.
+    """
+    key = _pool_key(tool_class, settings)
+    tool = _tools.get(key)
+    if tool is None:
+        with _lock:
+            tool = _tools.get(key)
+            if tool is None:
+                tool = tool_class(**settings)
+                _tools[key] = tool
+    return tool.model_copy()
+
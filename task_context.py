@@ -0,0 +1,78 @@
+import os
+from resources import get_router_llm
+from tools.cache import content_hash, get_summary_cache
+from usage import task_scope
+
+# ----------------------------------------------------------------------
+# Hand-off of task outputs to the tasks that depend on them.
+#
+# The concierge's plan_task receives both the city report and the city
+# guide, and that context is resent on every turn of its agent loop. With
+# TASK_CONTEXT_COMPRESSION=llm, those outputs are condensed into a short
+# structured brief right after they are produced, so the most expensive
+# task works from a much smaller prompt.
+# ----------------------------------------------------------------------
+CONTEXT_COMPRESSION = os.getenv("TASK_CONTEXT_COMPRESSION", "off").lower()
+CONTEXT_MODEL = os.getenv("TASK_CONTEXT_MODEL", "gemini/gemini-2.0-flash")
+# Outputs shorter than this are already cheap to pass on unchanged
+CONTEXT_MIN_CHARS = int(os.getenv("TASK_CONTEXT_MIN_CHARS", 2000))
+
+BRIEF_SECTIONS = (
+    "Chosen city",
+    "Dates",
+    "Weather",
+    "Flights",
+    "Hotels",
+    "Attractions",
+    "Restaurants",
+    "Events",
+    "Costs",
+    "Tips & risks",
+)
+
+BRIEF_PROMPT = (
+    "Condense the travel research below into a structured brief for the planner who will "
+    "write the final itinerary. Use exactly these Markdown headings, one short bullet list each: "
+    + ", ".join(BRIEF_SECTIONS) + ". "
+    "Keep every concrete name, price, date, address and link; drop prose, repetition and "
+    "generic advice. Write 'n/a' under a heading the research does not cover. "
+    "Return only the brief.\n\nRESEARCH ({key})\n----------\n{text}"
+)
+
+
+def output_text(output) -> str:
+    return getattr(output, "raw", None) or str(output)
+
+
+def condense(key: str, text: str, llm=None, cache=None) -> str:
+    """Structured brief of one task output, cached by content hash."""
+    if len(text) < CONTEXT_MIN_CHARS:
+        return text
+    cache_key = f"context:{content_hash(text)}"
+    if cache is not None:
+        brief = cache.get(cache_key)
+        if brief is not None:
+            return brief
+
+    llm = llm or get_router_llm(CONTEXT_MODEL)
+    # Accounted separately from the task that produced the output
+    with task_scope(f"condense:{key}"):
+        brief = str(llm.call(BRIEF_PROMPT.format(key=key, text=text))).strip()
+    if not brief:
+        return text
+
+    if cache is not None:
+        cache.set(cache_key, brief)
+    return brief
+
+
+def handoff(key: str, output, compress: bool) -> str:
+    """Text that dependent tasks receive for ``output``."""
+    text = output_text(output)
+    if not compress or CONTEXT_COMPRESSION != "llm":
+        return text
+    try:
+        return condense(key, text, cache=get_summary_cache())
+    except Exception:
+        # A failed condensation only costs prompt size, never the plan
+        return text
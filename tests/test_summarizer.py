@@ -0,0 +1,35 @@
+import os
+import pytest
+
+# No telemetry or trace upload from the offline crews below
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+pytest.importorskip("crewai")
+
+from bench.fakes import FakeLLM
+from tools.summarizer import split_chunks, summarize_chunks
+
+
+class DictCache(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def test_summarize_chunks_runs_each_chunk_through_the_llm():
+    llm = FakeLLM(latency=0, output_words=30)
+    summary = summarize_chunks(llm, ["Lisbon has trams.", "Porto has wine cellars."], max_workers=1, reduce=False)
+    assert summary.strip()
+    assert "Error" not in summary
+    assert llm.calls == 2
+
+
+def test_summarize_chunks_reduce_is_cached():
+    llm = FakeLLM(latency=0, output_words=30)
+    cache = DictCache()
+    chunks = split_chunks("\n\n".join(f"Paragraph {i} " * 40 for i in range(40)), size=2000)
+    first = summarize_chunks(llm, chunks, max_workers=2, reduce=True, cache=cache)
+    assert first.strip()
+    assert llm.calls == len(chunks) + 1
+    assert summarize_chunks(llm, chunks, max_workers=2, reduce=True, cache=cache) == first
+    assert llm.calls == len(chunks) + 1
@@ -1,71 +1,117 @@
 import os
 import json
-import requests
-import streamlit as st
+import asyncio
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from unstructured.partition.html import partition_html
-from crewai import Agent, Task
-from langchain_openai import ChatOpenAI
+from tools import http_session
+from tools.cache import get_page_cache, get_summary_cache
+from tools.events import tool_span
+from tools.html_extract import EXTRACTOR, aread_page, partition_text, read_page
+from tools.relevance import select_relevant
+from tools.summarizer import split_chunks, summarize_chunks
+from resources import get_router_llm
 
-from crewai import LLM
+BROWSERLESS_URL = os.getenv("BROWSERLESS_URL", "https://chrome.browserless.io/content")
 
 class WebsiteInput(BaseModel):
     website: str = Field(..., description="The website URL to scrape")
+    query: str = Field("", description="What you are looking for on the page, e.g. 'vegan restaurants and prices'")
 
 class BrowserTools(BaseTool):
     name: str = "Scrape website content"
-    description: str = "Useful to scrape and summarize a website content"
+    description: str = (
+        "Useful to scrape and summarize a website content. "
+        "Pass what you are looking for as query to summarize only the relevant parts"
+    )
     args_schema: type[BaseModel] = WebsiteInput
 
-    def _run(self, website: str) -> str:
+    def _request(self, website: str):
+        # url = f"https://chrome.browserless.io/content?token={st.secrets['BROWSERLESS_API_KEY']}"
+        url = f"{BROWSERLESS_URL}?token={os.getenv('BROWSERLESS_API_KEY')}"
+        payload = json.dumps({"url": website})
+        headers = {'cache-control': 'no-cache', 'content-type': 'application/json'}
+        return url, payload, headers
+
+    def _page_key(self, website: str, query: str) -> str:
+        # Filtered summaries depend on the query, unfiltered ones keep the plain URL key
+        query = " ".join(query.lower().split())
+        return f"{website}#query={query}" if query else website
+
+    def _cached_summary(self, website: str, query: str):
+        # An unexpired entry for this URL skips browserless and the LLM entirely
+        page_cache = get_page_cache()
+        cached_page = page_cache.get(self._page_key(website, query)) if page_cache is not None else None
+        return cached_page["summary"] if cached_page is not None else None
+
+    def _summarize(self, website: str, text: str, query: str) -> str:
+        # Only the paragraphs that match the query reach the LLM
+        content = split_chunks(select_relevant(text, query))
+        if not content:
+            # Not cached, so a page that failed to render is fetched again next time
+            return f"Error: No readable content found on {website}"
+
+        # ----------------------------------------------------------------------
+        # STEP 2: Gemini first, the router falls back to GPT per call if it fails
+        # ----------------------------------------------------------------------
+        llm = get_router_llm("gemini/gemini-2.0-flash")
+
+        summary = summarize_chunks(llm, content, cache=get_summary_cache())
+        if not summary.strip():
+            return f"Error: Could not summarize the content of {website}"
+        page_cache = get_page_cache()
+        if page_cache is not None:
+            page_cache.set(self._page_key(website, query), {"text": text, "summary": summary})
+        return summary
+
+    def _run(self, website: str, query: str = "") -> str:
+        with tool_span(self.name, website, provider="browserless"):
+            return self._scrape(website, query)
+
+    async def _arun(self, website: str, query: str = "") -> str:
+        with tool_span(self.name, website, provider="browserless"):
+            return await self._ascrape(website, query)
+
+    def _scrape(self, website: str, query: str = "") -> str:
         try:
-            # url = f"https://chrome.browserless.io/content?token={st.secrets['BROWSERLESS_API_KEY']}"
-            url = f"https://chrome.browserless.io/content?token={os.getenv('BROWSERLESS_API_KEY')}"
-            payload = json.dumps({"url": website})
-            headers = {'cache-control': 'no-cache', 'content-type': 'application/json'}
-            response = requests.request("POST", url, headers=headers, data=payload)
-            
+            cached = self._cached_summary(website, query)
+            if cached is not None:
+                return cached
+
+            url, payload, headers = self._request(website)
+            # Streamed, so extraction can stop reading once the content budget is met
+            response = http_session.post(url, provider="browserless", headers=headers, data=payload, stream=True)
+
             if response.status_code != 200:
+                response.close()
                 return f"Error: Failed to fetch website content. Status code: {response.status_code}"
-            
-            elements = partition_html(text=response.text)
-            content = "\n\n".join([str(el) for el in elements])
-            content = [content[i:i + 8000] for i in range(0, len(content), 8000)]
-            summaries = []
-            
-            # ----------------------------------------------------------------------
-            # STEP 2: Try Gemini first, fallback to GPT if Gemini fails
-            # ----------------------------------------------------------------------
-            llm = None
-            try:
-                llm = LLM(model="gemini/gemini-2.0-flash")
-                # Optional quick test call to verify Gemini works
-            except Exception as e:
-                st.warning(f"⚠️ Gemini failed: {e}\nSwitching to GPT-4o-mini fallback...")
-                llm = LLM(
-                    model="gpt-5-mini",
-                    api_key=os.getenv("OPENAI_API_KEY")
-                )
-                st.success("✅ Fallback to GPT-5-mini successful")
-            
-            for chunk in content:
-                agent = Agent(
-                    role='Principal Researcher',
-                    goal='Do amazing researches and summaries based on the content you are working with',
-                    backstory="You're a Principal Researcher at a big company and you need to do a research about a given topic.",
-                    allow_delegation=False,
-                    llm=llm
-                )
-                task = Task(
-                    description=f'Analyze and summarize the content below, make sure to include the most relevant information in the summary, return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}',
-                    agent=agent
-                )
-                summary = task.execute()
-                summaries.append(summary)
-            return "\n\n".join(summaries)
+
+            if EXTRACTOR == "unstructured":
+                text = partition_text(response.text)
+            else:
+                text = read_page(website, response)
+            return self._summarize(website, text, query)
         except Exception as e:
             return f"Error while processing website: {str(e)}"
 
-    async def _arun(self, website: str) -> str:
-        raise NotImplementedError("Async not implemented")
+    async def _ascrape(self, website: str, query: str = "") -> str:
+        try:
+            # The SQLite backend blocks, keep it off the event loop
+            cached = await asyncio.to_thread(self._cached_summary, website, query)
+            if cached is not None:
+                return cached
+
+            url, payload, headers = self._request(website)
+            async with http_session.apost_stream(url, provider="browserless", headers=headers, content=payload) as response:
+                if response.status_code != 200:
+                    return f"Error: Failed to fetch website content. Status code: {response.status_code}"
+
+                if EXTRACTOR == "unstructured":
+                    await response.aread()
+                    text = await asyncio.to_thread(partition_text, response.text)
+                else:
+                    text = await aread_page(website, response)
+
+            # The LLM client is synchronous, keep summarization off the event loop
+            return await asyncio.to_thread(self._summarize, website, text, query)
+        except Exception as e:
+            return f"Error while processing website: {str(e)}"
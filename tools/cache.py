@@ -0,0 +1,273 @@
+import os
+import json
+import hashlib
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so near-identical queries share one entry."""
+    return " ".join(str(query).lower().split())
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TieredStats:
+    """
+    Stats of a TieredCache as one cache: a lookup is a hit when either tier
+    has the key and a miss only when both miss. Per-tier stats are included.
+    """
+
+    def __init__(self, memory: CacheStats, disk: CacheStats):
+        self.memory = memory
+        self.disk = disk
+
+    def as_dict(self):
+        combined = CacheStats()
+        combined.hits = self.memory.hits + self.disk.hits
+        # The disk tier is only asked after a memory miss
+        combined.misses = self.disk.misses
+        combined.evictions = self.disk.evictions
+        combined.expired = self.disk.expired
+        return {**combined.as_dict(), "memory": self.memory.as_dict(), "disk": self.disk.as_dict()}
+
+
+class LRUCache:
+    """In-process LRU cache with per-entry TTL and a max entry count."""
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = 3600):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """On-disk cache shared across processes; values are stored as JSON."""
+
+    def __init__(self, path: str, max_entries: int = 10000, default_ttl: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.evictions += overflow
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TieredCache:
+    """LRU in front of a persistent backend; disk hits are promoted to memory."""
+
+    def __init__(self, memory: LRUCache, disk: SQLiteCache):
+        self.memory = memory
+        self.disk = disk
+
+    @property
+    def stats(self):
+        return TieredStats(self.memory.stats, self.disk.stats)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def __len__(self):
+        return len(self.disk)
+
+
+def build_cache(prefix: str, default_ttl: float, default_backend: str = "memory"):
+    """
+    Build a cache from environment variables:
+
+    - <PREFIX>_BACKEND: "memory", "sqlite" or "none" (default: ``default_backend``)
+    - <PREFIX>_TTL: seconds an entry stays fresh
+    - <PREFIX>_MAX_ENTRIES: entries kept before least-recently-used eviction
+    - <PREFIX>_PATH: SQLite file for the "sqlite" backend
+    """
+    backend = os.getenv(f"{prefix}_BACKEND", default_backend).lower()
+    if backend == "none":
+        return None
+    ttl = float(os.getenv(f"{prefix}_TTL", default_ttl))
+    max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", 512))
+    memory = LRUCache(max_entries=max_entries, default_ttl=ttl)
+    if backend == "sqlite":
+        path = os.getenv(f"{prefix}_PATH", os.path.join(".cache", f"{prefix.lower()}.sqlite3"))
+        disk = SQLiteCache(path, max_entries=max_entries * 20, default_ttl=ttl)
+        return TieredCache(memory, disk)
+    return memory
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _named_cache(prefix: str, default_ttl: float):
+    if prefix not in _caches:
+        with _caches_lock:
+            if prefix not in _caches:
+                _caches[prefix] = build_cache(prefix, default_ttl)
+    return _caches[prefix]
+
+
+def get_search_cache():
+    """Process-wide cache for Serper responses, created on first use."""
+    return _named_cache("SEARCH_CACHE", default_ttl=6 * 3600)
+
+
+def set_search_cache(cache):
+    """Swap in a different backend (or None to disable caching)."""
+    _caches["SEARCH_CACHE"] = cache
+
+
+def get_page_cache():
+    """URL -> extracted text and final summary; short TTL so pages get re-checked."""
+    return _named_cache("PAGE_CACHE", default_ttl=3600)
+
+
+def get_summary_cache():
+    """Content hash -> summary; long TTL since identical content never changes."""
+    return _named_cache("SUMMARY_CACHE", default_ttl=7 * 86400)
+
+
+def cache_stats():
+    """Stats of every named cache created so far, keyed by prefix."""
+    return {prefix: cache.stats.as_dict() for prefix, cache in list(_caches.items()) if cache is not None}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,109 @@
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+
+# ----------------------------------------------------------------------
+# Lightweight progress events for crew runs.
+#
+# Listeners registered with ``listen`` only see events emitted from the
+# same context (i.e. the thread running one crew), so concurrent crews do
+# not see each other's progress. ``subscribe`` registers a process-wide
+# listener for things like metrics.
+# ----------------------------------------------------------------------
+_listeners = contextvars.ContextVar("event_listeners", default=())
+_global_listeners = []
+
+
+def subscribe(callback):
+    _global_listeners.append(callback)
+
+
+@contextmanager
+def listen(callback):
+    token = _listeners.set(_listeners.get() + (callback,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+def emit(event_type: str, **data):
+    event = {"type": event_type, "timestamp": time.time(), **data}
+    for callback in _listeners.get() + tuple(_global_listeners):
+        try:
+            callback(event)
+        except Exception:
+            # Progress reporting must never break the crew run
+            pass
+
+
+@contextmanager
+def tool_span(tool: str, argument: str, provider: str = None):
+    """Emit tool_started / tool_finished (with latency) around a tool call."""
+    emit("tool_started", tool=tool, input=argument, provider=provider)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit("tool_finished", tool=tool, input=argument, provider=provider,
+             latency_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+class AsyncEventQueue:
+    """
+    Bridge events from a worker thread into an asyncio consumer.
+
+    The queue is bounded: a producer thread blocks while it is full, so a
+    slow client slows the crew down instead of growing memory. If the
+    consumer goes away, the producer gives up after ``put_timeout`` seconds
+    and further events are dropped. The end of the stream is signalled apart
+    from the bounded queue, so the consumer always terminates once it has
+    drained what was delivered.
+    """
+
+    def __init__(self, maxsize: int = 100, put_timeout: float = 30):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.put_timeout = put_timeout
+        self.closed = False
+        self._finished = asyncio.Event()
+
+    def put_threadsafe(self, event):
+        if self.closed:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(event), self.loop)
+        try:
+            future.result(timeout=self.put_timeout)
+        except Exception:
+            future.cancel()
+            self.closed = True
+
+    def finish(self):
+        try:
+            self.loop.call_soon_threadsafe(self._finished.set)
+        except RuntimeError:
+            # The loop is already closed, nobody is reading
+            pass
+
+    def close(self):
+        self.closed = True
+
+    async def __aiter__(self):
+        while True:
+            if not self.queue.empty():
+                yield self.queue.get_nowait()
+                continue
+            if self._finished.is_set():
+                return
+            getter = asyncio.ensure_future(self.queue.get())
+            finished = asyncio.ensure_future(self._finished.wait())
+            try:
+                await asyncio.wait((getter, finished), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                finished.cancel()
+                if not getter.done():
+                    # Cancelling a pending get() does not lose an item
+                    getter.cancel()
+            if getter.done() and not getter.cancelled():
+                yield getter.result()
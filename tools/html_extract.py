@@ -0,0 +1,271 @@
+import os
+import re
+import codecs
+from html.parser import HTMLParser
+from tools import events
+
+# ----------------------------------------------------------------------
+# Streaming HTML -> text extraction for scraped pages.
+#
+# The page is parsed as it is downloaded: navigation, footers, cookie
+# banners and other boilerplate are dropped, and reading stops as soon as
+# BROWSER_CONTENT_BUDGET characters of content have been kept, so memory
+# and summarization cost follow the useful content, not the page size.
+# ----------------------------------------------------------------------
+EXTRACTOR = os.getenv("BROWSER_EXTRACTOR", "stream").lower()
+CONTENT_BUDGET = int(os.getenv("BROWSER_CONTENT_BUDGET", 48000))
+READ_CHUNK_BYTES = 16384
+MIN_PARAGRAPH_CHARS = 25
+# Elements flagged only by an id/class word are dropped when their text is
+# shorter than this; a large "restaurant-menu" block is content, not a menu
+HINT_SKIP_MAX_CHARS = 500
+# Bytes buffered to look for a <meta charset> when the response names no charset
+CHARSET_SNIFF_BYTES = 1024
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "nav", "footer",
+             "header", "aside", "form", "button", "select", "dialog"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "source", "track", "wbr"}
+BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+              "blockquote", "pre", "section", "article", "main", "br", "h1", "h2", "h3",
+              "h4", "h5", "h6"}
+CONTENT_ROOTS = {"html", "body", "main", "article"}
+# A start tag of one of these closes an open element of the same tag (``<li>a<li>b``),
+# searching no further than the enclosing list or table
+IMPLIED_END_TAGS = {"li", "p", "dt", "dd", "tr", "td", "th", "option"}
+SCOPE_TAGS = {"ul", "ol", "dl", "table", "tbody", "thead", "tfoot", "select"} | CONTENT_ROOTS
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Matched against whole words of each id/class token ("site-footer", "cookie_banner")
+BOILERPLATE = re.compile(
+    r"(?:^|[-_])(?:cookie|consent|gdpr|banner|newsletter|subscribe|breadcrumb|navbar|menu|sidebar|"
+    r"footer|social|share|advert|promo|popup|modal|related|comment)s?(?:$|[-_])",
+    re.I,
+)
+# State classes such as "has-sidebar" describe the element, they do not name it
+STATE_CLASS = re.compile(r"^(?:has|is|with|no|show)[-_]", re.I)
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.I)
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def response_charset(response):
+    """The charset named in the response's Content-Type header, if any."""
+    match = HEADER_CHARSET.search(response.headers.get("content-type") or "")
+    return match.group(1) if match else None
+
+
+class StreamingExtractor(HTMLParser):
+    """
+    Incremental extractor; feed bytes until ``done`` and read ``text()``.
+
+    The bytes are decoded with a byte order mark if present, else the
+    ``encoding`` from the response headers, else a ``<meta charset>`` in the
+    first CHARSET_SNIFF_BYTES, else UTF-8.
+    """
+
+    def __init__(self, budget: int = CONTENT_BUDGET, encoding: str = None):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.encoding = encoding
+        self.bytes_in = 0
+        self.chars_kept = 0
+        self.done = False
+        self._decoder = None
+        self._head = b""
+        # Open non-void elements; a skip ends when the stack drops back to its level,
+        # so an unclosed skipped element ends with its parent
+        self._stack = []
+        self._skip_level = None
+        # Outermost element flagged by a class hint; its paragraphs stay provisional
+        # (``_held``) until it closes or turns out to be large
+        self._hint_level = None
+        self._held = False
+        self._held_from = 0
+        self._held_chars = 0
+        self._held_text = 0
+        self._heading = False
+        self._buffer = []
+        self._paragraphs = []
+        self._seen = set()
+
+    def feed_bytes(self, data: bytes):
+        self.bytes_in += len(data)
+        if self._decoder is None:
+            self._head += data
+            if len(self._head) < CHARSET_SNIFF_BYTES and not self.encoding:
+                return
+            data, self._head = self._head, b""
+            self._start_decoder(data)
+        self.feed(self._decoder.decode(data))
+
+    def _start_decoder(self, head: bytes):
+        encoding = next((name for bom, name in BOMS if head.startswith(bom)), None) or self.encoding
+        if not encoding:
+            match = META_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            encoding = "utf-8"
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.encoding = encoding
+
+    def close(self):
+        if self._decoder is None:
+            head, self._head = self._head, b""
+            self._start_decoder(head)
+            self.feed(self._decoder.decode(head))
+        self.feed(self._decoder.decode(b"", final=True))
+        super().close()
+        self._flush()
+        if self._held:
+            self._drop_held()
+
+    def text(self) -> str:
+        return "\n\n".join(self._paragraphs)
+
+    def _boilerplate(self, tag, attrs):
+        """``"skip"`` for elements that are always boilerplate, ``"hint"`` for a class/id match."""
+        if tag in SKIP_TAGS:
+            return "skip"
+        if tag in CONTENT_ROOTS:
+            # Class names on these often describe page state ("has-cookie-banner")
+            return None
+        attrs = dict(attrs)
+        if attrs.get("role") in BOILERPLATE_ROLES or "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return "skip"
+        tokens = f"{attrs.get('id') or ''} {attrs.get('class') or ''}".split()
+        if any(BOILERPLATE.search(token) and not STATE_CLASS.match(token) for token in tokens):
+            return "hint"
+        return None
+
+    def _close_implied(self, tag):
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i] == tag:
+                self._pop_to(i)
+                return
+            if self._stack[i] in SCOPE_TAGS:
+                return
+
+    def _pop_to(self, index):
+        del self._stack[index:]
+        if self._skip_level is not None and len(self._stack) <= self._skip_level:
+            self._skip_level = None
+        if self._hint_level is not None and len(self._stack) <= self._hint_level:
+            self._hint_level = None
+            if self._held:
+                self._flush()
+                self._drop_held()
+
+    def _drop_held(self):
+        # Still small when its element closed: drop what it contributed
+        self._held = False
+        for paragraph in self._paragraphs[self._held_from:]:
+            self._seen.discard(paragraph.removeprefix("## "))
+        del self._paragraphs[self._held_from:]
+        self.chars_kept = self._held_chars
+        self.done = self.chars_kept >= self.budget
+
+    def handle_starttag(self, tag, attrs):
+        if tag in IMPLIED_END_TAGS:
+            self._close_implied(tag)
+        if tag not in VOID_TAGS:
+            level = len(self._stack)
+            self._stack.append(tag)
+            if self._skip_level is not None:
+                return
+            kind = self._boilerplate(tag, attrs)
+            if kind == "skip":
+                self._flush()
+                self._skip_level = level
+                return
+            # Hints nested in a hinted element ("menu-item" in "restaurant-menu") follow its verdict
+            if kind == "hint" and self._hint_level is None:
+                self._flush()
+                self._hint_level, self._held = level, True
+                self._held_from, self._held_chars, self._held_text = len(self._paragraphs), self.chars_kept, 0
+        elif self._skip_level is not None:
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self._heading = tag in HEADINGS
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            # Stray end tag, or the end of a void element
+            return
+        skipping = self._skip_level is not None
+        if tag in BLOCK_TAGS and not skipping:
+            self._flush()
+        self._pop_to(len(self._stack) - 1 - self._stack[::-1].index(tag))
+
+    def handle_data(self, data):
+        if self._skip_level is not None or self.done:
+            return
+        self._buffer.append(data)
+        if self._held:
+            self._held_text += len(data.strip())
+            if self._held_text >= HINT_SKIP_MAX_CHARS:
+                # Too large to be a widget, keep it as content
+                self._held = False
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        paragraph = " ".join("".join(self._buffer).split())
+        self._buffer = []
+        heading, self._heading = self._heading, False
+        if self.done or not paragraph or paragraph in self._seen:
+            return
+        # Short fragments are link lists and labels; headings are kept for structure
+        if len(paragraph) < MIN_PARAGRAPH_CHARS and not heading:
+            return
+        self._seen.add(paragraph)
+        if heading:
+            paragraph = f"## {paragraph}"
+        self._paragraphs.append(paragraph)
+        self.chars_kept += len(paragraph) + 2
+        if self.chars_kept >= self.budget:
+            self.done = True
+
+
+def _report(url: str, extractor: StreamingExtractor):
+    events.emit("page_extracted", url=url, bytes_in=extractor.bytes_in,
+                chars_kept=extractor.chars_kept, truncated=extractor.done)
+
+
+def read_page(url: str, response, budget: int = CONTENT_BUDGET) -> str:
+    """Extract text from a streamed ``requests`` response, closing it once the budget is met."""
+    extractor = StreamingExtractor(budget, encoding=response_charset(response))
+    try:
+        for chunk in response.iter_content(chunk_size=READ_CHUNK_BYTES):
+            extractor.feed_bytes(chunk)
+            if extractor.done:
+                break
+    finally:
+        response.close()
+    extractor.close()
+    _report(url, extractor)
+    return extractor.text()
+
+
+async def aread_page(url: str, response, budget: int = CONTENT_BUDGET) -> str:
+    """Async counterpart of ``read_page`` for a streamed ``httpx`` response."""
+    extractor = StreamingExtractor(budget, encoding=response_charset(response))
+    async for chunk in response.aiter_bytes(READ_CHUNK_BYTES):
+        extractor.feed_bytes(chunk)
+        if extractor.done:
+            break
+    extractor.close()
+    _report(url, extractor)
+    return extractor.text()
+
+
+def partition_text(html: str) -> str:
+    """The previous whole-document path via unstructured (BROWSER_EXTRACTOR=unstructured)."""
+    # unstructured is slow to import, load it on the first page only
+    from unstructured.partition.html import partition_html
+
+    elements = partition_html(text=html)
+    return "\n\n".join([str(el) for el in elements])
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from tools import rate_limit
+
+# ----------------------------------------------------------------------
+# Shared, keep-alive HTTP session for every outbound tool call.
+# Configuration comes from the environment so it can be tuned per deploy.
+#
+# Retries are done here rather than in urllib3 so that every attempt,
+# including a retry after a 429, takes a token from the provider's rate
+# limit bucket.
+# ----------------------------------------------------------------------
+POOL_SIZE = int(os.getenv("TOOLS_HTTP_POOL_SIZE", 20))
+CONNECT_TIMEOUT = float(os.getenv("TOOLS_HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("TOOLS_HTTP_READ_TIMEOUT", 60))
+MAX_RETRIES = int(os.getenv("TOOLS_HTTP_MAX_RETRIES", 3))
+BACKOFF_FACTOR = float(os.getenv("TOOLS_HTTP_BACKOFF", 0.5))
+# A server-sent Retry-After longer than this is capped, so one reply cannot park a tool call
+MAX_RETRY_AFTER = float(os.getenv("TOOLS_HTTP_MAX_RETRY_AFTER", 30))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    # No adapter-level retries, see post()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_AFTER)
+    return BACKOFF_FACTOR * (2 ** attempt)
+
+
+def post(url, provider: str = None, **kwargs) -> requests.Response:
+    """
+    POST through the pooled session with the configured default timeouts.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with backoff
+    (Serper and browserless are read-only POST APIs, so this is safe). Each
+    attempt waits for a ``provider`` rate-limit token; the last response is
+    returned as is so callers can report the status code.
+    """
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        if provider:
+            rate_limit.acquire(provider)
+        response = None
+        try:
+            response = session.post(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            response.close()
+        time.sleep(_retry_delay(attempt, response))
+
+
+# ----------------------------------------------------------------------
+# Async counterpart used by the tools' _arun implementations.
+# httpx clients are bound to the loop they were created on, so one pooled
+# client is kept per running event loop.
+# ----------------------------------------------------------------------
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_client():
+    """Close the running loop's client; call on app shutdown."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def apost(url, provider: str = None, **kwargs) -> httpx.Response:
+    """Async POST with the same retry and rate-limit policy as ``post``."""
+    client = get_async_client()
+    for attempt in range(MAX_RETRIES + 1):
+        if provider:
+            await rate_limit.aacquire(provider)
+        response = None
+        try:
+            response = await client.post(url, **kwargs)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+@asynccontextmanager
+async def apost_stream(url, provider: str = None, **kwargs):
+    """Like ``apost``, but the body is left unread for ``response.aiter_bytes()``."""
+    client = get_async_client()
+    for attempt in range(MAX_RETRIES + 1):
+        if provider:
+            await rate_limit.aacquire(provider)
+        response = None
+        try:
+            response = await client.send(client.build_request("POST", url, **kwargs), stream=True)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                try:
+                    yield response
+                finally:
+                    await response.aclose()
+                return
+            await response.aclose()
+        await asyncio.sleep(_retry_delay(attempt, response))
@@ -0,0 +1,150 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from tools import events
+from usage import current_request_id
+
+# ----------------------------------------------------------------------
+# Per-provider token buckets for outbound tool calls.
+#
+# Calls wait for a token instead of hitting the provider's rate limit and
+# getting a 429. Waiting calls are grouped by crew run (request id) and
+# served round-robin, so one crew with many queued searches cannot starve
+# the others.
+#
+# - <PROVIDER>_QPS: sustained requests per second (0 disables the limit)
+# - <PROVIDER>_BURST: requests allowed back to back after an idle period
+# ----------------------------------------------------------------------
+DEFAULT_LIMITS = {
+    "serper": (5.0, 10),
+    "browserless": (2.0, 4),
+}
+
+
+class TokenBucket:
+    def __init__(self, provider: str, rate: float, burst: int):
+        self.provider = provider
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._queues = {}
+        self._order = deque()
+        self._cond = threading.Condition()
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _enqueue(self, crew):
+        ticket = object()
+        with self._cond:
+            if crew not in self._queues:
+                self._queues[crew] = deque()
+                self._order.append(crew)
+            self._queues[crew].append(ticket)
+        return ticket
+
+    def _poll(self, crew, ticket) -> float:
+        """0 once ``ticket`` holds a token, else seconds to wait before polling again."""
+        with self._cond:
+            self._refill()
+            head = self._order[0]
+            if self._queues[head][0] is not ticket:
+                # Not our turn; woken (or re-polled) when the head is served
+                return max(1 / self.rate, 0.01)
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            self._queues[head].popleft()
+            self._order.popleft()
+            if self._queues[head]:
+                self._order.append(head)
+            else:
+                del self._queues[head]
+            self._cond.notify_all()
+            return 0
+
+    def _cancel(self, crew, ticket):
+        with self._cond:
+            queue = self._queues.get(crew)
+            if queue is None or ticket not in queue:
+                return
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[crew]
+                self._order.remove(crew)
+            self._cond.notify_all()
+
+    def acquire(self):
+        crew = current_request_id()
+        ticket = self._enqueue(crew)
+        start = time.perf_counter()
+        try:
+            while True:
+                delay = self._poll(crew, ticket)
+                if not delay:
+                    break
+                with self._cond:
+                    self._cond.wait(delay)
+        except BaseException:
+            self._cancel(crew, ticket)
+            raise
+        self._report(start)
+
+    async def aacquire(self):
+        crew = current_request_id()
+        ticket = self._enqueue(crew)
+        start = time.perf_counter()
+        try:
+            while True:
+                delay = self._poll(crew, ticket)
+                if not delay:
+                    break
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._cancel(crew, ticket)
+            raise
+        self._report(start)
+
+    def _report(self, start: float):
+        events.emit("tool_queued", provider=self.provider,
+                    wait_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(provider: str):
+    """Process-wide bucket for ``provider``, or None when it is not rate limited."""
+    if provider not in _buckets:
+        with _buckets_lock:
+            if provider not in _buckets:
+                default_rate, default_burst = DEFAULT_LIMITS.get(provider, (0, 1))
+                rate = float(os.getenv(f"{provider.upper()}_QPS", default_rate))
+                burst = int(os.getenv(f"{provider.upper()}_BURST", default_burst))
+                _buckets[provider] = TokenBucket(provider, rate, burst) if rate > 0 else None
+    return _buckets[provider]
+
+
+def acquire(provider: str):
+    bucket = get_bucket(provider)
+    if bucket is not None:
+        bucket.acquire()
+
+
+async def aacquire(provider: str):
+    bucket = get_bucket(provider)
+    if bucket is not None:
+        await bucket.aacquire()
+
+
+def queue_depths():
+    return {provider: bucket.waiting() for provider, bucket in list(_buckets.items()) if bucket is not None}
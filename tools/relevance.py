@@ -0,0 +1,98 @@
+import os
+import re
+import math
+from collections import Counter
+
+# ----------------------------------------------------------------------
+# Local relevance filter for scraped pages.
+#
+# Before any chunk is summarized, the page's paragraphs are ranked with
+# BM25 against what the agent is looking for, and only the best ones are
+# kept, in page order, up to BROWSER_RELEVANCE_BUDGET characters. A long
+# page then costs one or two summarization calls instead of one per 8000
+# characters.
+#
+# - BROWSER_RELEVANCE_FILTER: "bm25" (default) or "off"
+# - BROWSER_RELEVANCE_BUDGET: characters kept per page (two chunks)
+# ----------------------------------------------------------------------
+RELEVANCE_FILTER = os.getenv("BROWSER_RELEVANCE_FILTER", "bm25").lower()
+RELEVANCE_BUDGET = int(os.getenv("BROWSER_RELEVANCE_BUDGET", 16000))
+K1 = 1.5
+B = 0.75
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "best", "by", "can", "do", "for", "from", "get",
+    "good", "how", "i", "in", "info", "information", "is", "it", "its", "me", "near", "of", "on",
+    "or", "our", "that", "the", "their", "there", "this", "to", "top", "us", "we", "what", "when",
+    "where", "which", "who", "with", "you", "your",
+}
+
+
+def tokenize(text: str):
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def bm25_scores(query: str, paragraphs):
+    """Okapi BM25 score of every paragraph for ``query``."""
+    terms = set(tokenize(query))
+    docs = [Counter(tokenize(paragraph)) for paragraph in paragraphs]
+    if not terms or not docs:
+        return [0.0] * len(docs)
+
+    avg_len = sum(sum(doc.values()) for doc in docs) / len(docs) or 1
+    idf = {}
+    for term in terms:
+        df = sum(1 for doc in docs if term in doc)
+        idf[term] = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term in terms:
+            tf = doc.get(term)
+            if tf:
+                score += idf[term] * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def _heading_of(paragraphs, index):
+    for i in range(index - 1, -1, -1):
+        if paragraphs[i].startswith("## "):
+            return i
+    return None
+
+
+def select_relevant(text: str, query: str, budget: int = RELEVANCE_BUDGET) -> str:
+    """
+    The paragraphs of ``text`` most relevant to ``query``, in page order.
+
+    Each kept paragraph brings its section heading along. Text that already
+    fits the budget is returned unchanged; when nothing matches the query,
+    the start of the page is kept instead.
+    """
+    if RELEVANCE_FILTER == "off" or not query or len(text) <= budget:
+        return text
+    paragraphs = [paragraph.strip() for paragraph in text.split("\n\n") if paragraph.strip()]
+    scores = bm25_scores(query, paragraphs)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+    if not ranked:
+        ranked = range(len(paragraphs))
+
+    keep, used = set(), 0
+    for i in ranked:
+        wanted = [i]
+        heading = _heading_of(paragraphs, i)
+        if heading is not None and heading not in keep:
+            wanted.insert(0, heading)
+        cost = sum(len(paragraphs[j]) + 2 for j in wanted if j not in keep)
+        if used + cost > budget:
+            continue
+        keep.update(wanted)
+        used += cost
+    if not keep:
+        # A single paragraph larger than the budget (e.g. text without breaks)
+        return text[:budget]
+    return "\n\n".join(paragraphs[i] for i in sorted(keep))
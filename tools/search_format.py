@@ -0,0 +1,126 @@
+import os
+import json
+from urllib.parse import urlparse
+
+# ----------------------------------------------------------------------
+# Rendering of Serper responses into tool observations.
+#
+# Every observation is fed back into the agent's LLM loop, so the compact
+# and json styles keep the information (answer box, knowledge graph,
+# distinct sources, short snippets) while dropping the decoration.
+#
+# - SEARCH_RESULT_STYLE: "compact" (default), "json" or "verbose" (the
+#   original Title/Link/Snippet blocks)
+# - SEARCH_MAX_RESULTS: organic results per query
+# - SEARCH_SNIPPET_CHARS: snippets are cut at a word boundary past this
+# - SEARCH_DEDUPE_DOMAINS: keep only the first result per domain
+# ----------------------------------------------------------------------
+RESULT_STYLE = os.getenv("SEARCH_RESULT_STYLE", "compact").lower()
+MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 4))
+SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", 200))
+DEDUPE_DOMAINS = os.getenv("SEARCH_DEDUPE_DOMAINS", "true").lower() in ("1", "true", "yes")
+STYLES = ("compact", "json", "verbose")
+
+
+def domain(link: str) -> str:
+    host = urlparse(link).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def trim(text: str, limit: int) -> str:
+    text = " ".join(str(text or "").split())
+    if limit <= 0 or len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut.rstrip(",;:.") + "…"
+
+
+class ResultFormatter:
+    def __init__(self, style: str = None, max_results: int = None, snippet_chars: int = None,
+                 dedupe_domains: bool = None):
+        self.style = (style or RESULT_STYLE).lower()
+        if self.style not in STYLES:
+            raise ValueError(f"Unknown search result style '{self.style}', expected one of: {', '.join(STYLES)}")
+        self.max_results = MAX_RESULTS if max_results is None else max_results
+        self.snippet_chars = SNIPPET_CHARS if snippet_chars is None else snippet_chars
+        self.dedupe_domains = DEDUPE_DOMAINS if dedupe_domains is None else dedupe_domains
+
+    def answer(self, data: dict):
+        box = data.get("answerBox") or {}
+        text = box.get("answer") or box.get("snippet")
+        return trim(text, self.snippet_chars) if text else None
+
+    def knowledge(self, data: dict):
+        graph = data.get("knowledgeGraph") or {}
+        if not graph.get("title"):
+            return None
+        return {
+            "title": graph["title"],
+            "type": graph.get("type"),
+            "description": trim(graph.get("description"), self.snippet_chars) or None,
+            "attributes": graph.get("attributes") or {},
+        }
+
+    def select(self, data: dict, seen_links=None):
+        """Organic results to show, skipping repeated links (and domains) and ``seen_links``."""
+        seen_links = seen_links if seen_links is not None else set()
+        domains = set()
+        results = []
+        for result in data.get("organic", []):
+            link = result.get("link")
+            if not link or not result.get("title") or link in seen_links:
+                continue
+            if self.dedupe_domains:
+                if domain(link) in domains:
+                    continue
+                domains.add(domain(link))
+            seen_links.add(link)
+            results.append({
+                "title": result["title"],
+                "link": link,
+                "snippet": trim(result.get("snippet", ""), self.snippet_chars),
+            })
+            if len(results) >= self.max_results:
+                break
+        return results
+
+    def format(self, data: dict, seen_links=None) -> str:
+        if self.style == "verbose":
+            return self._verbose(data)
+        if "organic" not in data:
+            return "No results found or API error occurred."
+
+        answer, knowledge = self.answer(data), self.knowledge(data)
+        results = self.select(data, seen_links)
+        if self.style == "json":
+            payload = {"answer": answer, "knowledge_graph": knowledge, "results": results}
+            return json.dumps({k: v for k, v in payload.items() if v}, ensure_ascii=False, separators=(",", ":"))
+
+        lines = []
+        if answer:
+            lines.append(f"Answer: {answer}")
+        if knowledge:
+            kind = f" ({knowledge['type']})" if knowledge["type"] else ""
+            facts = "; ".join(f"{k}: {v}" for k, v in knowledge["attributes"].items())
+            lines.append(f"About {knowledge['title']}{kind}: " + " ".join(
+                part for part in (knowledge["description"], facts) if part))
+        for result in results:
+            lines.append(f"- {result['title']} | {result['link']}\n  {result['snippet']}")
+        return "\n".join(lines) if lines else "No new results"
+
+    def _verbose(self, data: dict) -> str:
+        if 'organic' not in data:
+            return "No results found or API error occurred."
+
+        string = []
+        for result in data['organic'][:self.max_results]:
+            try:
+                string.append('\n'.join([
+                    f"Title: {result['title']}",
+                    f"Link: {result['link']}",
+                    f"Snippet: {result['snippet']}",
+                    "\n-----------------"
+                ]))
+            except KeyError:
+                continue
+        return '\n'.join(string) if string else "No valid results found"
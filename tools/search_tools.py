@@ -1,52 +1,177 @@
 import os
 import json
-import requests
-import streamlit as st
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
+from tools import http_session
+from tools.cache import get_search_cache, normalize_query
+from tools.events import tool_span
+from tools.search_format import MAX_RESULTS, RESULT_STYLE, ResultFormatter
+
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", 6))
+BATCH_RESULTS_PER_QUERY = int(os.getenv("SEARCH_BATCH_RESULTS_PER_QUERY", 3))
+
+
+class SearchAPIError(Exception):
+    """Serper answered with a non-200 status."""
+
 
 class SearchQuery(BaseModel):
     query: str = Field(..., description="The search query to look up")
 
+class BatchSearchQuery(BaseModel):
+    queries: List[str] = Field(..., description=f"Up to {BATCH_MAX_QUERIES} related search queries to run at once")
+
 class SearchTools(BaseTool):
     name: str = "Search the internet"
     description: str = "Useful to search the internet about a given topic and return relevant results"
     args_schema: type[BaseModel] = SearchQuery
+    # Per-instance so each agent can get its own number of results
+    max_results: int = MAX_RESULTS
+    result_style: str = RESULT_STYLE
+
+    def _request(self, query: str):
+        payload = json.dumps({"q": query})
+        headers = {
+            # 'X-API-KEY': st.secrets['SERPER_API_KEY'],
+            'X-API-KEY': os.getenv('SERPER_API_KEY'),
+            'content-type': 'application/json'
+        }
+        return payload, headers
+
+    def _store(self, cache, cache_key, data):
+        # Only successful responses are cached so errors are retried next time
+        if cache is not None and 'organic' in data:
+            cache.set(cache_key, data)
+
+    def _formatter(self) -> ResultFormatter:
+        return ResultFormatter(style=self.result_style, max_results=self.max_results)
+
+    def _format(self, data) -> str:
+        return self._formatter().format(data)
 
     def _run(self, query: str) -> str:
-        try:
-            top_result_to_return = 4
-            url = "https://google.serper.dev/search"
-            payload = json.dumps({"q": query})
-            headers = {
-                # 'X-API-KEY': st.secrets['SERPER_API_KEY'],
-                'X-API-KEY': os.getenv('SERPER_API_KEY'),
-                'content-type': 'application/json'
-            }
-            response = requests.request("POST", url, headers=headers, data=payload)
-            
+        with tool_span(self.name, query, provider="serper"):
+            return self._search(query)
+
+    async def _arun(self, query: str) -> str:
+        with tool_span(self.name, query, provider="serper"):
+            return await self._asearch(query)
+
+    def _fetch(self, query: str) -> dict:
+        cache = get_search_cache()
+        cache_key = normalize_query(query)
+        data = cache.get(cache_key) if cache is not None else None
+
+        if data is None:
+            payload, headers = self._request(query)
+            response = http_session.post(SERPER_URL, provider="serper", headers=headers, data=payload)
+
+            if response.status_code != 200:
+                raise SearchAPIError(f"Search API request failed. Status code: {response.status_code}")
+
+            data = response.json()
+            self._store(cache, cache_key, data)
+        return data
+
+    async def _afetch(self, query: str) -> dict:
+        cache = get_search_cache()
+        cache_key = normalize_query(query)
+        # The SQLite backend blocks, keep it off the event loop
+        data = await asyncio.to_thread(cache.get, cache_key) if cache is not None else None
+
+        if data is None:
+            payload, headers = self._request(query)
+            response = await http_session.apost(SERPER_URL, provider="serper", headers=headers, content=payload)
+
             if response.status_code != 200:
-                return f"Error: Search API request failed. Status code: {response.status_code}"
-            
+                raise SearchAPIError(f"Search API request failed. Status code: {response.status_code}")
+
             data = response.json()
-            if 'organic' not in data:
-                return "No results found or API error occurred."
-            
-            results = data['organic']
-            string = []
-            for result in results[:top_result_to_return]:
-                try:
-                    string.append('\n'.join([
-                        f"Title: {result['title']}", 
-                        f"Link: {result['link']}",
-                        f"Snippet: {result['snippet']}", 
-                        "\n-----------------"
-                    ]))
-                except KeyError:
-                    continue
-            return '\n'.join(string) if string else "No valid results found"
+            await asyncio.to_thread(self._store, cache, cache_key, data)
+        return data
+
+    def _search(self, query: str) -> str:
+        try:
+            return self._format(self._fetch(query))
+        except SearchAPIError as e:
+            return f"Error: {e}"
         except Exception as e:
             return f"Error during search: {str(e)}"
 
-    async def _arun(self, query: str) -> str:
-        raise NotImplementedError("Async not implemented")
+    async def _asearch(self, query: str) -> str:
+        try:
+            return self._format(await self._afetch(query))
+        except SearchAPIError as e:
+            return f"Error: {e}"
+        except Exception as e:
+            return f"Error during search: {str(e)}"
+
+
+class BatchSearchTools(SearchTools):
+    """
+    Run several related searches in one tool call.
+
+    Queries run concurrently over the pooled connections, results seen for an
+    earlier query are dropped by link, and one compact combined block is
+    returned, so an agent gathers a city's baseline facts in one LLM turn.
+    """
+
+    name: str = "Search the internet for several queries"
+    description: str = (
+        "Useful to run several related searches at once (e.g. weather, events, flights and hotels "
+        "for one city) and get one combined list of results"
+    )
+    args_schema: type[BaseModel] = BatchSearchQuery
+    max_results: int = BATCH_RESULTS_PER_QUERY
+
+    def _queries(self, queries):
+        """Unique queries to run, and the ones past BATCH_MAX_QUERIES that were skipped."""
+        if isinstance(queries, str):
+            queries = queries.split("\n")
+        unique = []
+        for query in queries:
+            if query.strip() and normalize_query(query) not in map(normalize_query, unique):
+                unique.append(query.strip())
+        return unique[:BATCH_MAX_QUERIES], unique[BATCH_MAX_QUERIES:]
+
+    def _format_batch(self, queries, outcomes, skipped=()) -> str:
+        formatter = self._formatter()
+        if formatter.style == "verbose":
+            # Verbose blocks would defeat the point of batching
+            formatter.style = "compact"
+        seen = set()
+        sections = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, SearchAPIError):
+                body = f"Error: {outcome}"
+            elif isinstance(outcome, Exception):
+                body = f"Error during search: {outcome}"
+            else:
+                body = formatter.format(outcome, seen_links=seen)
+            sections.append(f"## {query}\n{body}")
+        if skipped:
+            # Tell the agent, so it can run the rest in another call instead of assuming no results
+            sections.append(f"Note: only {BATCH_MAX_QUERIES} queries run per call; skipped: "
+                            + "; ".join(skipped))
+        return "\n\n".join(sections) if sections else "No queries given"
+
+    def _run(self, queries) -> str:
+        queries, skipped = self._queries(queries)
+        with tool_span(self.name, "; ".join(queries), provider="serper"):
+            # One context copy per query so usage tags and rate-limit fairness follow the call
+            contexts = [contextvars.copy_context() for _ in queries]
+            with ThreadPoolExecutor(max_workers=max(1, len(queries))) as pool:
+                futures = [pool.submit(ctx.run, self._fetch, query) for query, ctx in zip(queries, contexts)]
+            outcomes = [future.exception() or future.result() for future in futures]
+            return self._format_batch(queries, outcomes, skipped)
+
+    async def _arun(self, queries) -> str:
+        queries, skipped = self._queries(queries)
+        with tool_span(self.name, "; ".join(queries), provider="serper"):
+            outcomes = await asyncio.gather(*(self._afetch(query) for query in queries), return_exceptions=True)
+            return self._format_batch(queries, outcomes, skipped)
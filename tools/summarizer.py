@@ -0,0 +1,129 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from crewai import Agent, Task
+from tools.cache import content_hash
+
+# ----------------------------------------------------------------------
+# Map-reduce summarization of scraped page chunks.
+# ----------------------------------------------------------------------
+CHUNK_SIZE = 8000
+SUMMARY_CONCURRENCY = int(os.getenv("BROWSER_SUMMARY_CONCURRENCY", 4))
+SUMMARY_REDUCE = os.getenv("BROWSER_SUMMARY_REDUCE", "false").lower() in ("1", "true", "yes")
+
+
+def _is_cut_point(paragraph: str) -> bool:
+    # Decided by the paragraph's own text, so boundaries survive edits elsewhere
+    return int(content_hash(paragraph)[:8], 16) % 3 == 0
+
+
+def split_chunks(content: str, size: int = CHUNK_SIZE):
+    """
+    Split on paragraph breaks into chunks of at most ``size`` characters.
+
+    A chunk ends after a cut-point paragraph once it is three quarters full,
+    or before it would overflow, so chunks stay close to ``size`` and a page
+    needs few summarization calls. After an insertion near the top of a page the chunks
+    fall back onto the same boundaries, so later chunks keep their hashes
+    and summaries. Paragraphs longer than ``size`` are sliced.
+    """
+    chunks, current, length = [], [], 0
+    for paragraph in content.split("\n\n"):
+        if not paragraph.strip():
+            continue
+        pieces = [paragraph[i:i + size] for i in range(0, len(paragraph), size)]
+        for piece in pieces:
+            if current and length + len(piece) + 2 > size:
+                chunks.append("\n\n".join(current))
+                current, length = [], 0
+            current.append(piece)
+            length += len(piece) + 2
+            if length >= size * 3 // 4 and _is_cut_point(piece):
+                chunks.append("\n\n".join(current))
+                current, length = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _researcher(llm):
+    return Agent(
+        role='Principal Researcher',
+        goal='Do amazing researches and summaries based on the content you are working with',
+        backstory="You're a Principal Researcher at a big company and you need to do a research about a given topic.",
+        allow_delegation=False,
+        llm=llm
+    )
+
+
+def summarize_chunk(llm, chunk: str) -> str:
+    # Agents keep per-run state, so every worker gets its own Agent and Task
+    agent = _researcher(llm)
+    task = Task(
+        description=f'Analyze and summarize the content below, make sure to include the most relevant information in the summary, return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}',
+        expected_output='A concise summary of the content',
+        agent=agent
+    )
+    return str(task.execute_sync(agent=agent))
+
+
+def reduce_summaries(llm, summaries) -> str:
+    joined = "\n\n".join(f"PART {i + 1}\n----------\n{s}" for i, s in enumerate(summaries))
+    agent = _researcher(llm)
+    task = Task(
+        description=f'Merge the partial summaries below into one concise summary of the whole page. Remove duplicated facts, keep names, prices, dates and links, return only the summary nothing else.\n\n{joined}',
+        expected_output='One concise summary of the whole page',
+        agent=agent
+    )
+    return str(task.execute_sync(agent=agent))
+
+
+def summarize_chunks(llm, chunks, max_workers: int = None, reduce: bool = None, cache=None) -> str:
+    """
+    Summarize chunks concurrently (map) and optionally merge them (reduce).
+
+    Output order always follows chunk order, regardless of completion order.
+    With a cache, summaries are looked up by content hash, so only chunks
+    whose text changed since the last run are sent to the LLM.
+    """
+    max_workers = max_workers or SUMMARY_CONCURRENCY
+    reduce = SUMMARY_REDUCE if reduce is None else reduce
+    if not chunks:
+        return ""
+
+    hashes = [content_hash(chunk) for chunk in chunks]
+    page_key = f"page:{'reduce' if reduce else 'map'}:{content_hash(''.join(hashes))}"
+    if cache is not None:
+        page_summary = cache.get(page_key)
+        if page_summary is not None:
+            return page_summary
+
+    summaries = [None] * len(chunks)
+    if cache is not None:
+        for i, digest in enumerate(hashes):
+            summaries[i] = cache.get(f"chunk:{digest}")
+    pending = [i for i, summary in enumerate(summaries) if summary is None]
+
+    if len(pending) == 1 or max_workers <= 1:
+        fresh = [summarize_chunk(llm, chunks[i]) for i in pending]
+    elif pending:
+        # One context copy per chunk so usage/progress tags follow the LLM calls
+        contexts = [contextvars.copy_context() for _ in pending]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            fresh = list(pool.map(lambda i, ctx: ctx.run(summarize_chunk, llm, chunks[i]), pending, contexts))
+    else:
+        fresh = []
+
+    for i, summary in zip(pending, fresh):
+        summaries[i] = summary
+        # An empty answer is a failed call, not a summary worth keeping
+        if cache is not None and summary.strip():
+            cache.set(f"chunk:{hashes[i]}", summary)
+
+    if reduce and len(summaries) > 1:
+        result = reduce_summaries(llm, summaries)
+    else:
+        result = "\n\n".join(summaries)
+    if cache is not None and all(summary.strip() for summary in summaries):
+        cache.set(page_key, result)
+    return result
@@ -1,32 +1,38 @@
 
 from crewai import Agent
 import re
-import streamlit as st
-from langchain_core.language_models.chat_models import BaseChatModel
-from crewai import LLM
 from tools.browser_tools2 import BrowserTools
 from tools.calculator_tools import CalculatorTools
-from tools.search_tools import SearchTools
+from tools.search_tools import BatchSearchTools, SearchTools
+from resources import get_router_llm, shared_tool
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Only for the annotation; langchain is not needed at runtime
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 class TripAgents():
-    def __init__(self, llm: BaseChatModel = None):
+    def __init__(self, llm: "BaseChatModel" = None):
         if llm is None:
             #self.llm = LLM(model="groq/deepseek-r1-distill-llama-70b")
-            self.llm = LLM(model="gemini/gemini-2.0-flash")
+            self.llm = get_router_llm("gemini/gemini-2.0-flash")
         else:
             self.llm = llm
 
-        # Initialize tools once
-        self.search_tool = SearchTools()
-        self.browser_tool = BrowserTools()
-        self.calculator_tool = CalculatorTools()
+        # Tools are shared process-wide, not rebuilt per crew. Search results
+        # per agent: comparing cities needs fewer than writing a city guide.
+        self.guide_search_tool = shared_tool(SearchTools, max_results=5)
+        self.search_tool = shared_tool(SearchTools, max_results=3)
+        self.batch_search_tool = shared_tool(BatchSearchTools)
+        self.browser_tool = shared_tool(BrowserTools)
+        self.calculator_tool = shared_tool(CalculatorTools)
 
     def city_selection_agent(self):
         return Agent(
             role='City Selection Expert',
             goal='Select the best city based on weather, season, and prices',
             backstory='An expert in analyzing travel data to pick ideal destinations',
-            tools=[self.search_tool, self.browser_tool],
+            tools=[self.search_tool, self.batch_search_tool, self.browser_tool],
             allow_delegation=False,
             llm=self.llm,
             verbose=True
@@ -38,7 +44,7 @@ class TripAgents():
             goal='Provide the BEST insights about the selected city',
             backstory="""A knowledgeable local guide with extensive information
         about the city, it's attractions and customs""",
-            tools=[self.search_tool, self.browser_tool],
+            tools=[self.guide_search_tool, self.batch_search_tool, self.browser_tool],
             allow_delegation=False,
             llm=self.llm,
             verbose=True
@@ -83,6 +89,8 @@ class StreamToExpander:
             task_value = task_match_input.group(1).strip()
 
         if task_value:
+            import streamlit as st
+
             st.toast(":robot_face: " + task_value)
 
         # Check if the text contains the specified phrase and apply color
@@ -447,15 +447,21 @@
 
 import os
 import streamlit as st
-from crewai import Crew, LLM
+from crewai import Crew
 # from trip_agents2 import TripAgents, StreamToExpander
 from trip_agents import TripAgents, StreamToExpander
 from trip_tasks import TripTasks
+from resources import get_router_llm
+from dag import CREW_EXECUTOR, build_trip_graph, graph_workers, run_dag, single_city
+from checkpoints import TaskCheckpoint
+from coalesce import request_key
 import datetime
 import sys
+import threading
 import traceback
 import asyncio
 import nest_asyncio  # ✅ FIX added
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from langchain_openai import OpenAI
 
 # ✅ Enables asyncio.run() inside Streamlit
@@ -513,77 +519,68 @@ class TripCrew:
         self.serper_api_key = os.getenv("SERPER_API_KEY", "")
 
 
-        # Initialize Gemini as the primary model
-        self.llm = self.create_llm("gemini")
+        # Gemini first; each LLM call fails over to OpenAI on its own, no whole-crew retry
+        self.llm = get_router_llm("gemini/gemini-2.5-flash", api_key=self.gemini_api_key)
 
-    def create_llm(self, provider="gemini"):
-        """Create LLM instance for Gemini or OpenAI."""
-        try:
-            if provider == "gemini":
-                # st.info("🧠 Using Gemini (Primary LLM)...")
-                llm = LLM(model="gemini/gemini-2.5-flash", api_key=self.gemini_api_key)
-            elif provider == "openai":
-                st.info("🪄 Switching to OpenAI (Fallback)...")
-                llm = LLM(model="gpt-5-mini", api_key=self.openai_api_key)
-            else:
-                raise ValueError("Invalid LLM provider")
-            return llm
-        except Exception as e:
-            st.error(f"Failed to initialize {provider}: {str(e)}")
-            raise
+        # Completed task outputs survive a provider failure or app restart
+        self.checkpoint = TaskCheckpoint(request_key(
+            origin=self.origin, cities=self.cities, date_range=self.date_range, interests=self.interests
+        ))
 
     async def try_run_with_llm(self, llm):
-        """Run the crew process using a given LLM."""
+        """Run the trip tasks using a given LLM, skipping tasks already checkpointed."""
         agents = TripAgents(llm=llm)
         tasks = TripTasks()
 
+        if CREW_EXECUTOR != "dag":
+            return self.run_sequential(agents, tasks)
+
+        graph = build_trip_graph(
+            agents, tasks, self.origin, self.cities, self.interests, self.date_range,
+        )
+        # Worker threads need the Streamlit script context to write to the page
+        ctx = get_script_run_ctx()
+        outputs = run_dag(
+            graph,
+            max_workers=graph_workers(graph),
+            checkpoint=self.checkpoint,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+        )
+        self.checkpoint.clear([node.key for node in graph])
+        return outputs["final_itinerary"].raw
+
+    def run_sequential(self, agents, tasks):
+        """CREW_EXECUTOR=sequential: one crewai Crew running the three tasks in order."""
         city_selector_agent = agents.city_selection_agent()
         local_expert_agent = agents.local_expert()
         travel_concierge_agent = agents.travel_concierge()
 
         identify_task = tasks.identify_task(
-            city_selector_agent, self.origin, self.cities, self.interests, self.date_range,
+            city_selector_agent, self.origin, self.cities, self.interests, self.date_range
         )
-
         gather_task = tasks.gather_task(
-            local_expert_agent, self.origin, self.interests, self.date_range,
-        )
-
-        plan_task = tasks.plan_task(
-            travel_concierge_agent, self.origin, self.interests, self.date_range,
+            local_expert_agent, self.origin, self.interests, self.date_range, city=single_city(self.cities)
         )
+        plan_task = tasks.plan_task(travel_concierge_agent, self.origin, self.interests, self.date_range)
 
         crew = Crew(
             agents=[city_selector_agent, local_expert_agent, travel_concierge_agent],
             tasks=[identify_task, gather_task, plan_task],
-            verbose=True,
+            verbose=True
         )
-
-        result = crew.kickoff()
-        return result
+        return crew.kickoff().raw
 
     def run(self):
-        """Run trip planning with automatic Gemini → OpenAI fallback."""
+        """Run trip planning; Gemini → OpenAI fallback happens per LLM call in the router."""
         try:
-            # --- Attempt 1: Gemini ---
             result = asyncio.run(self.try_run_with_llm(self.llm))
             self.output_placeholder.markdown(result)
             return result
-        except Exception as gemini_error:
-            st.warning(f"⚠️ Gemini failed: {str(gemini_error)}")
+        except Exception as error:
+            # Completed tasks stay checkpointed, so submitting again resumes from there
+            st.error(f"❌ Both Gemini and OpenAI failed.\n{error}")
             traceback.print_exc()
-
-            # --- Attempt 2: Fallback to OpenAI ---
-            try:
-                fallback_llm = self.create_llm("openai")
-                result = asyncio.run(self.try_run_with_llm(fallback_llm))
-                st.success("✅ Successfully continued with OpenAI fallback.")
-                self.output_placeholder.markdown(result)
-                return result
-            except Exception as openai_error:
-                st.error(f"❌ Both Gemini and OpenAI failed.\n{openai_error}")
-                traceback.print_exc()
-                return None
+            return None
 
 
 # ------------------------------------------------
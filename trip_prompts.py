@@ -0,0 +1,373 @@
+import os
+from functools import lru_cache
+from textwrap import dedent
+
+# ----------------------------------------------------------------------
+# Task prompt templates.
+#
+# The static instruction blocks are dedented once at import time. Trip
+# details (origin, dates, interests...) are interpolated exactly once, in
+# a footer, instead of being repeated throughout the instructions.
+#
+# TRIP_PROMPT_PROFILE selects the wording:
+# - full: the detailed instructions
+# - compact: the same deliverable sections in far fewer tokens
+#
+#     python -m trip_prompts    # token count per task and profile
+# ----------------------------------------------------------------------
+PROMPT_PROFILE = os.getenv("TRIP_PROMPT_PROFILE", "full").lower()
+PROFILES = ("full", "compact")
+
+TIP_SECTION = "If you do your BEST WORK, I'll tip you $100 and grant you any wish you want!"
+# The scrape tool only filters a page down to the relevant paragraphs when it gets a query
+SCRAPE_SECTION = (
+    "When you scrape a website, always pass a `query` with what you need from that page "
+    "and the traveler interests listed below, so only the relevant parts are summarized."
+)
+# Tasks whose agent has the scrape tool and is expected to research
+SCRAPE_TASKS = ("identify", "city_research", "gather", "plan")
+
+# Footer lines per task: (label, field)
+FOOTERS = {
+    "identify": (("Traveling From", "origin"), ("City Options", "cities"),
+                 ("Trip Date", "range"), ("Traveler Interests", "interests")),
+    "city_research": (("Traveling From", "origin"), ("City", "city"),
+                      ("Trip Date", "range"), ("Traveler Interests", "interests")),
+    "rank": (("Traveling From", "origin"), ("City Options", "cities"),
+             ("Trip Date", "range"), ("Traveler Interests", "interests")),
+    "gather": (("City", "city"), ("Trip Date", "range"),
+               ("Traveling from", "origin"), ("Traveler Interests", "interests")),
+    "plan": (("Trip Date", "range"), ("Traveling from", "origin"), ("Traveler Interests", "interests")),
+}
+
+_FULL = {
+    "identify": """
+        Analyze and select the **best city** for the upcoming trip from the given options,
+        using a **comprehensive multi-factor evaluation**. Your role is to act as a
+        professional travel consultant, comparing all candidate cities on the following criteria:
+
+        1. **Weather & Seasonal Conditions**
+        - Current weather forecast for the exact travel dates.
+        - Typical seasonal climate patterns (temperature, rainfall, humidity).
+        - Suitability of weather for the traveler’s interests.
+        - Any extreme conditions or advisories (storms, heatwaves, monsoons, etc.).
+
+        2. **Cultural & Seasonal Events**
+        - Major festivals, concerts, exhibitions, or local holidays during the trip period.
+        - Impact on the trip (higher energy, cultural immersion, or overcrowding, price spikes).
+        - How these events enhance or limit the traveler’s experience.
+
+        3. **Travel Costs**
+        - Actual flight costs from the origin to each city (economy-class average).
+        - Accommodation averages (3–4 star hotels or equivalent per night).
+        - Local transportation (metro passes, taxis, rideshare costs).
+        - Meal costs (average daily spend for breakfast, lunch, and dinner).
+        - Attraction entry fees and extras.
+        - Total estimated trip budget for each option.
+
+        4. **Traveler Interests & Attractions**
+        - Match the traveler’s interests to real attractions and activities.
+        - Identify must-see landmarks, museums, outdoor spaces, or hidden gems.
+        - Explain why each recommended place is relevant and worth visiting.
+
+        5. **Accessibility & Practical Factors**
+        - Visa requirements or restrictions (if applicable).
+        - Safety considerations (crime rate, scams, health advisories).
+        - Language/cultural barriers and ease of navigation for visitors.
+        - Transportation convenience (public transport, walking-friendliness, airports).
+
+        ---
+        🔎 **Final Deliverable**
+
+        Your final answer must be a **detailed and structured travel report** recommending
+        ONE city as the best option. The report must include:
+
+        - 🏙️ **Chosen City & Justification**: Explain why this city stands out.
+        - 🌦️ **Weather Forecast**: Daily outlook with implications for activities.
+        - ✈️ **Flight Costs**: At least 2 actual sample flight options with prices and duration.
+        - 🏨 **Accommodation Options**: Specific hotels (with prices, location, and reasoning).
+        - 🎭 **Events & Seasonal Highlights**: What’s happening in the city during the trip.
+        - 🗺️ **Attractions & Activities**: Specific recommendations matched to interests.
+        - 💰 **Budget Breakdown**: Estimated total cost (flights, hotels, food, transport, attractions).
+        - ⚠️ **Risks & Considerations**: Any potential downsides or travel advisories.
+        - ✅ **Final Recommendation**: A clear conclusion on why this city provides
+        the BEST overall experience for this trip.
+    """,
+    "city_research": """
+        Research **{city}** as a candidate destination for the trip below and
+        report the facts needed to compare it with other cities.
+
+        1. **Weather**: forecast and typical climate for the trip dates, and how it suits the interests.
+        2. **Events**: notable festivals or holidays during the trip.
+        3. **Flights**: typical economy fare and duration from the origin.
+        4. **Hotels**: average nightly rate for a 3–4 star hotel.
+        5. **Daily costs**: food, local transport and attraction fees per day.
+        6. **Interest match**: 3 attractions or activities matching the interests.
+        7. **Risks**: visa, safety or seasonal advisories.
+
+        Your final answer must be ONLY a JSON object with the keys:
+        "city", "weather", "events", "flight_cost", "hotel_per_night",
+        "daily_cost", "highlights" (list), "risks", "score" (1-10 overall fit).
+    """,
+    "rank": """
+        The context contains one structured research result per candidate city.
+        Compare them and select the **best city** for this trip. Do not repeat the
+        research; rely on the provided results.
+
+        Your final answer must be a **structured travel report** recommending ONE city:
+
+        - 🏙️ **Chosen City & Justification**: Why it beats the other candidates.
+        - 📊 **Comparison Table**: One row per city with weather, flight cost, hotel/night,
+        daily cost and score.
+        - 🌦️ **Weather**, ✈️ **Flight Costs**, 🏨 **Accommodation**, 🎭 **Events**
+        for the chosen city.
+        - 💰 **Budget Breakdown**: Estimated total cost for the chosen city.
+        - ⚠️ **Risks & Considerations**.
+    """,
+    "gather": """
+        As a **local expert** on this city, create an **in-depth, insider-style travel guide**
+        designed to help a visitor have THE BEST possible trip during the trip dates.
+        The guide should go beyond generic tourist information, providing **local insights,
+        hidden gems, cultural etiquette, and practical travel advice**.
+
+        ### Scope of the Guide
+
+        1. **City Overview**
+        - A short introduction capturing the city's character and vibe.
+        - Why this city is special and worth visiting.
+
+        2. **Weather & Seasonal Insights**
+        - Weather forecast during the travel period.
+        - Seasonal climate expectations (temperature, rainfall, humidity).
+        - Best clothing recommendations and packing tips.
+
+        3. **Attractions & Activities**
+        - Must-visit landmarks and world-famous sites.
+        - Cultural hotspots (museums, theaters, galleries, historic districts).
+        - Hidden gems only locals know (cafés, neighborhoods, secret spots).
+        - Daily activity recommendations tailored to the traveler interests.
+        - Suggested morning, afternoon, and evening activities for balance.
+
+        4. **Food & Dining**
+        - Iconic local dishes to try (street food + fine dining).
+        - Specific restaurants, cafés, or food markets with insider reasoning
+            (authenticity, atmosphere, popularity among locals).
+        - Unique food experiences (cooking classes, night markets, food tours).
+
+        5. **Events & Festivals**
+        - Cultural or seasonal events happening during the trip dates.
+        - Why these events are meaningful and how they enhance the experience.
+
+        6. **Local Customs & Culture**
+        - Essential etiquette, dos and don’ts (greetings, tipping, dress codes).
+        - Key cultural values and traditions travelers should respect.
+        - Useful local phrases or expressions.
+
+        7. **Neighborhoods & Areas to Explore**
+        - Best districts for history, nightlife, shopping, and relaxation.
+        - Recommendations for safe and authentic experiences.
+
+        8. **Transportation & Navigation**
+        - How to get around (public transport, taxis, walking, bike rentals).
+        - Insider tips to save money and avoid common tourist pitfalls.
+
+        9. **Costs & Budget**
+        - High-level cost overview (average hotel rates, daily food costs,
+            transport passes, attraction entry fees).
+        - Options for both budget-friendly and premium travelers.
+
+        10. **Safety & Practical Tips**
+            - Safety notes (scams, common issues, areas to avoid).
+            - Health tips, emergency numbers, and essential apps.
+            - Travel hacks to maximize the trip.
+
+        ---
+        🔎 **Final Deliverable**
+
+        Your final output must be a **comprehensive city guide** written in a clear,
+        engaging style. It should feel like advice from a well-connected local friend
+        who knows all the best spots and how to navigate the city like a pro.
+
+        The guide should include:
+        - 🌆 City introduction and vibe
+        - 🌦️ Weather and packing guidance
+        - 🗺️ Attractions (famous + hidden gems)
+        - 🍽️ Food and dining highlights
+        - 🎭 Seasonal events and festivals
+        - 🙌 Local customs and etiquette
+        - 🏙️ Neighborhood breakdown
+        - 🚇 Transportation tips
+        - 💰 High-level costs and budgeting advice
+        - ⚠️ Safety and insider tips
+    """,
+    "plan": """
+        Expand this guide into a **full travel itinerary** for the selected
+        time period, building a **day-by-day trip plan** that covers
+        every major detail a traveler would need. This itinerary must include:
+
+        1. **Daily Schedule**
+        - Morning, afternoon, and evening activities.
+        - Actual attractions, museums, neighborhoods, and hidden gems.
+        - Logical sequencing (minimize travel time between stops).
+        - Suggested downtime or relaxation periods.
+
+        2. **Weather Forecast Integration**
+        - Anticipated weather for each day.
+        - How the weather impacts activities (e.g., indoor vs outdoor).
+        - Contingency options if weather shifts unexpectedly.
+
+        3. **Food & Dining**
+        - Specific restaurants, cafés, and street food spots.
+        - A mix of local favorites, iconic must-tries, and hidden gems.
+        - Justification for each pick (authentic cuisine, cultural value, ratings).
+
+        4. **Accommodation**
+        - Recommended actual hotels, boutique stays, or Airbnbs.
+        - Location reasoning (proximity to attractions, safety, transport).
+        - Approximate nightly rate.
+
+        5. **Packing & Clothing Suggestions**
+        - Daily clothing suggestions based on weather forecast.
+        - Essential items (jackets, umbrellas, sunscreen, power adapters).
+        - Activity-specific gear (hiking shoes, swimwear, evening outfits).
+
+        6. **Budget Breakdown**
+        - Flights from the origin (actual price range).
+        - Accommodation costs (total for the stay).
+        - Daily activity/entrance fees.
+        - Food and drinks (average per meal).
+        - Local transportation (metro, taxi, rideshare, passes).
+        - Souvenirs & miscellaneous.
+        - Final estimated total trip budget.
+
+        7. **Practical Travel Logistics**
+        - Airport arrival & transfer details (how to get to the hotel).
+        - Local transportation recommendations (metro cards, bus passes, bikes).
+        - Safety notes (pickpockets, scams, neighborhoods to avoid).
+        - Cultural etiquette (tipping, dress codes, polite customs).
+        - Language tips (useful phrases or apps).
+
+        8. **Special Highlights**
+        - At least one unique or off-the-beaten-path experience per day.
+        - Why each attraction, restaurant, or activity is worth including.
+        - Seasonal or cultural events happening during the trip.
+
+        9. **💸 Free vs Paid Activities**
+        - Identify which attractions, activities, or experiences are **Free** (no entry fee) and which are **Paid** (require a ticket or cost).
+        - Mention approximate prices for paid activities where possible.
+        - Ensure free activities are highlighted as great value experiences.
+        - Include a concise summary table at the end of the itinerary, for example:
+
+            | Type | Attraction | Approx. Cost | Notes |
+            |------|-------------|---------------|-------|
+            | Free | Central Park | $0 | Great for morning walks |
+            | Paid | Louvre Museum | $20 | Skip-the-line tickets recommended |
+
+        Your final answer MUST be a **fully fleshed-out travel plan** formatted
+        in **Markdown**, with sections like:
+
+        - 🛬 Arrival & Departure logistics
+        - 📅 Day-by-Day Itinerary (with weather, activities, meals, and costs)
+        - 🏨 Accommodation details
+        - 🍽️ Restaurant & food guide
+        - 🎒 Packing checklist
+        - 💰 Budget breakdown
+        - ⚠️ Travel tips & safety notes
+
+        Give each section its own `##` heading and start every day with a heading
+        like `### Day 1 – <date>: <theme>`, with one bullet per activity.
+
+        This should read like a **professional travel agency itinerary**,
+        ensuring that the traveler enjoys THE BEST TRIP EVER.
+    """,
+}
+
+_COMPACT = {
+    "identify": """
+        Pick the ONE best city from the options as a travel consultant. Compare weather for
+        the dates, events, costs (flights from origin, 3-4* hotels, food, transport, fees),
+        attractions matching the interests, and visa/safety/navigation.
+
+        Answer in Markdown with: Chosen City & Justification; Weather Forecast (daily);
+        Flight Costs (2+ real options, price, duration); Accommodation (specific hotels, price,
+        area); Events; Attractions & Activities; Budget Breakdown (total); Risks;
+        Final Recommendation.
+    """,
+    "gather": """
+        As a local expert, write an insider city guide for the trip dates, going beyond
+        generic tourist info.
+
+        Answer in Markdown with: City intro & vibe; Weather & packing; Attractions (famous +
+        hidden gems, morning/afternoon/evening ideas matching the interests); Food & dining
+        (dishes, specific places, experiences); Events during the dates; Customs & etiquette
+        (plus useful phrases); Neighborhoods; Transportation & money-saving tips; Costs for
+        budget and premium travelers; Safety, health, emergency numbers, apps.
+    """,
+    "plan": """
+        Using the context, write a day-by-day itinerary for the whole trip.
+
+        Answer in Markdown with: Arrival & Departure logistics (airport transfer);
+        Day-by-Day Itinerary (per day: weather, morning/afternoon/evening activities in a
+        sensible route, meals at specific places, one off-the-beaten-path pick, costs,
+        weather fallback); Accommodation (real hotels, area, nightly rate); Restaurant & food
+        guide; Packing checklist; Budget breakdown (flights from origin, stay, fees, food,
+        transport, misc, total); Travel tips & safety (transport passes, etiquette, phrases);
+        a Free vs Paid table (Type | Attraction | Approx. Cost | Notes). Use a `##` heading per
+        section, `### Day N – <date>: <theme>` per day and one bullet per activity.
+    """,
+}
+
+# Precompiled once: {profile: {task: dedented block}}
+BLOCKS = {
+    "full": {task: dedent(text).strip() for task, text in _FULL.items()},
+    "compact": {task: dedent(_COMPACT.get(task, text)).strip() for task, text in _FULL.items()},
+}
+
+
+@lru_cache(maxsize=256)
+def _render(task: str, profile: str, fields: tuple) -> str:
+    values = dict(fields)
+    parts = [BLOCKS[profile][task].format(**values)]
+    if profile == "full" and task in ("identify", "gather", "plan"):
+        parts.append(TIP_SECTION)
+    if task in SCRAPE_TASKS:
+        parts.append(SCRAPE_SECTION)
+    parts.append("\n".join(f"{label}: {values[field]}" for label, field in FOOTERS[task]))
+    return "\n\n".join(parts)
+
+
+def render(task: str, profile: str = None, **fields) -> str:
+    """Build the description of ``task`` for ``profile`` (default: TRIP_PROMPT_PROFILE)."""
+    profile = (profile or PROMPT_PROFILE).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown prompt profile '{profile}', expected one of: {', '.join(PROFILES)}")
+    return _render(task, profile, tuple(sorted(fields.items())))
+
+
+def token_report(fields: dict, model: str = "gemini/gemini-2.5-flash"):
+    """Prompt tokens of every task description, per profile."""
+    from usage import estimate_tokens
+
+    report = []
+    for task, footer in FOOTERS.items():
+        task_fields = {field: fields[field] for _, field in footer}
+        row = {"task": task}
+        for profile in PROFILES:
+            row[profile] = estimate_tokens(model, render(task, profile, **task_fields))
+        row["saved_pct"] = round(100 * (1 - row["compact"] / row["full"]), 1)
+        report.append(row)
+    return report
+
+
+if __name__ == "__main__":
+    sample = {
+        "origin": "Bangalore, India",
+        "cities": "Krabi, Thailand; Bali, Indonesia",
+        "city": "Krabi, Thailand",
+        "range": "2025-06-01 to 2025-06-10",
+        "interests": "2 adults who love swimming, dancing, hiking, shopping, local food, "
+                     "water sports adventures and rock climbing",
+    }
+    print(f"{'task':<15}{'full':>8}{'compact':>10}{'saved %':>10}")
+    for row in token_report(sample):
+        print(f"{row['task']:<15}{row['full']:>8}{row['compact']:>10}{row['saved_pct']:>10}")
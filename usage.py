@@ -0,0 +1,173 @@
+import os
+import json
+import threading
+import contextvars
+from contextlib import contextmanager
+from tools import events
+
+# ----------------------------------------------------------------------
+# Token, latency and cost accounting for LLM and tool calls.
+#
+# Every ``llm_call`` / ``tool_finished`` event is tagged with the current
+# request id, agent role and task output_key, then aggregated per run and
+# process-wide. Token counts are the ones the provider reported; calls
+# without reported usage are estimated and counted as such.
+# ----------------------------------------------------------------------
+
+# USD per 1M tokens (input, output); override with LLM_PRICING_JSON
+DEFAULT_PRICING = {
+    "gemini/gemini-2.5-flash": (0.30, 2.50),
+    "gemini/gemini-2.0-flash": (0.10, 0.40),
+    "gpt-5-mini": (0.25, 2.00),
+}
+PRICING = {**DEFAULT_PRICING, **{k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICING_JSON", "{}")).items()}}
+
+_request_id = contextvars.ContextVar("usage_request_id", default=None)
+_task = contextvars.ContextVar("usage_task", default=None)
+_agent = contextvars.ContextVar("usage_agent", default=None)
+
+
+def estimate_tokens(model: str, payload) -> int:
+    """Estimated token count, via litellm when available, else roughly 4 characters per token."""
+    if isinstance(payload, str):
+        messages = [{"role": "user", "content": payload}]
+    else:
+        messages = payload or []
+    try:
+        import litellm
+        return litellm.token_counter(model=model, messages=messages)
+    except Exception:
+        text = "".join(str(m.get("content", "")) if isinstance(m, dict) else str(m) for m in messages)
+        return max(1, len(text) // 4)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+class UsageTotals:
+    def __init__(self):
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.llm_calls_estimated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_latency_ms = 0.0
+        self.cost_usd = 0.0
+        self.tool_calls = 0
+        self.tool_latency_ms = 0.0
+
+    def add(self, event):
+        if event["type"] == "llm_call":
+            self.llm_calls += 1
+            self.llm_errors += 1 if event.get("error") else 0
+            self.llm_calls_estimated += 1 if event.get("tokens_estimated") else 0
+            self.prompt_tokens += event.get("prompt_tokens", 0)
+            self.completion_tokens += event.get("completion_tokens", 0)
+            self.llm_latency_ms += event.get("latency_ms", 0.0)
+            self.cost_usd += event.get("cost_usd", 0.0)
+        elif event["type"] == "tool_finished":
+            self.tool_calls += 1
+            self.tool_latency_ms += event.get("latency_ms", 0.0)
+
+    def as_dict(self):
+        return {
+            "llm_calls": self.llm_calls,
+            "llm_errors": self.llm_errors,
+            # Calls whose token counts are estimates, not provider-reported usage
+            "llm_calls_tokens_estimated": self.llm_calls_estimated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "llm_latency_ms": round(self.llm_latency_ms, 1),
+            "estimated_cost_usd": round(self.cost_usd, 6),
+            "tool_calls": self.tool_calls,
+            "tool_latency_ms": round(self.tool_latency_ms, 1),
+        }
+
+
+class UsageReport:
+    """Totals plus breakdowns by task, agent, model and tool."""
+
+    def __init__(self):
+        self.total = UsageTotals()
+        self.by_task = {}
+        self.by_agent = {}
+        self.by_model = {}
+        self.by_tool = {}
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        groups = [(self.by_task, event.get("task") or "unknown"),
+                  (self.by_agent, event.get("agent") or "unknown")]
+        if event["type"] == "llm_call":
+            groups.append((self.by_model, event.get("model")))
+        else:
+            groups.append((self.by_tool, event.get("tool")))
+        with self._lock:
+            self.total.add(event)
+            for group, key in groups:
+                group.setdefault(key, UsageTotals()).add(event)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "total": self.total.as_dict(),
+                "by_task": {k: v.as_dict() for k, v in self.by_task.items()},
+                "by_agent": {k: v.as_dict() for k, v in self.by_agent.items()},
+                "by_model": {k: v.as_dict() for k, v in self.by_model.items()},
+                "by_tool": {k: v.as_dict() for k, v in self.by_tool.items()},
+            }
+
+
+process_usage = UsageReport()
+_runs = {}
+
+
+@contextmanager
+def track_run(request_id: str):
+    """Attribute every LLM/tool call made in this context to ``request_id``."""
+    report = UsageReport()
+    _runs[request_id] = report
+    token = _request_id.set(request_id)
+    try:
+        yield report
+    finally:
+        _request_id.reset(token)
+        _runs.pop(request_id, None)
+
+
+@contextmanager
+def task_scope(task_key: str, agent_role: str = None):
+    """Tag calls made while executing one task with its output_key and agent role."""
+    task_token = _task.set(task_key)
+    agent_token = _agent.set(agent_role)
+    try:
+        yield
+    finally:
+        _task.reset(task_token)
+        _agent.reset(agent_token)
+
+
+def current_request_id():
+    """Request id of the run executing in this context, if any."""
+    return _request_id.get()
+
+
+def current_task():
+    """output_key of the task executing in this context, if any."""
+    return _task.get()
+
+
+def _record(event):
+    if event["type"] not in ("llm_call", "tool_finished"):
+        return
+    event = dict(event, request_id=_request_id.get(), task=_task.get(), agent=_agent.get())
+    process_usage.add(event)
+    report = _runs.get(event["request_id"])
+    if report is not None:
+        report.add(event)
+
+
+events.subscribe(_record)
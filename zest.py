@@ -5,10 +5,14 @@ from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel, Field
 from datetime import date, datetime
 from typing import Optional
-from crewai import Crew, LLM
+from crewai import Crew
 from trip_agents2 import TripAgents
 from trip_tasks import TripTasks
+from tools import events
+from tools.events import AsyncEventQueue
+from resources import get_router_llm
 import os
+import json
 import asyncio
 from dotenv import load_dotenv
 from functools import lru_cache
@@ -84,9 +88,9 @@ class TripCrew:
         self.origin = origin
         self.interests = interests
         self.date_range = date_range
-        self.llm = LLM(model="gemini/gemini-2.5-flash")
+        self.llm = get_router_llm("gemini/gemini-2.5-flash")
 
-    def run(self):
+    def run(self, task_callback=None):
         agents = TripAgents(llm=self.llm)
         tasks = TripTasks()
 
@@ -101,7 +105,8 @@ class TripCrew:
         crew = Crew(
             agents=[city_selector, local_expert, travel_concierge],
             tasks=[identify_task, gather_task, plan_task],
-            verbose=True
+            verbose=True,
+            task_callback=task_callback
         )
 
         result = crew.kickoff()
@@ -112,6 +117,56 @@ class TripCrew:
         else:
             return str(result)
 
+# ======================== Progress Streaming ======================== #
+TASK_STAGES = [
+    ("chosen_city", "City Selection Expert"),
+    ("city_guide", "Local Expert at this city"),
+    ("final_itinerary", "Amazing Travel Concierge"),
+]
+
+async def stream_crew_events(trip_request: TripRequest):
+    """
+    Run the crew in a worker thread and yield its progress events as they happen.
+
+    The crew is sequential, so each finished task marks the start of the next one.
+    """
+    date_range = f"{trip_request.start_date} to {trip_request.end_date}"
+    stream = AsyncEventQueue(maxsize=int(os.getenv("STREAM_QUEUE_SIZE", 100)))
+
+    def work():
+        stage = {"index": 0}
+
+        def on_task_done(output):
+            key, agent = TASK_STAGES[stage["index"]]
+            events.emit("task_finished", task=key, agent=agent,
+                        output=getattr(output, "raw", None) or str(output))
+            stage["index"] += 1
+            if stage["index"] < len(TASK_STAGES):
+                key, agent = TASK_STAGES[stage["index"]]
+                events.emit("task_started", task=key, agent=agent)
+
+        with events.listen(stream.put_threadsafe):
+            try:
+                events.emit("crew_started", destination=trip_request.destination)
+                key, agent = TASK_STAGES[0]
+                events.emit("task_started", task=key, agent=agent)
+                trip_crew = TripCrew(trip_request.origin, trip_request.destination, date_range, trip_request.interests)
+                itinerary = trip_crew.run(task_callback=on_task_done)
+                events.emit("crew_finished", itinerary=itinerary)
+            except Exception as e:
+                events.emit("error", message=str(e))
+            finally:
+                stream.finish()
+
+    worker = asyncio.get_running_loop().run_in_executor(None, work)
+    try:
+        async for event in stream:
+            yield event
+    finally:
+        # Stop producing if the client went away; the crew finishes in the background
+        stream.close()
+        worker.add_done_callback(lambda f: f.exception())
+
 # ======================== Routes ======================== #
 @app.get("/")
 async def root():
@@ -172,19 +227,14 @@ async def plan_trip(trip_request: TripRequest, settings: Settings = Depends(vali
 
 @app.post("/api/v1/stream-trip")
 async def stream_trip(trip_request: TripRequest, settings: Settings = Depends(validate_api_keys)):
+    if trip_request.end_date <= trip_request.start_date:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+
     async def event_stream():
-        try:
-            yield "data: 🤖 Initializing trip planning system...\n\n"
-            await asyncio.sleep(1)
-            yield f"data: 🌍 Gathering information for {trip_request.destination}...\n\n"
-            await asyncio.sleep(1)
-            yield "data: 🧭 Analyzing preferences and constraints...\n\n"
-            await asyncio.sleep(1)
-            yield "data: ✈️ Generating optimized itinerary using CrewAI agents...\n\n"
-            await asyncio.sleep(1)
-            yield "data: ✅ Trip planning complete!\n\n"
-        except Exception as e:
-            yield f"data: ❌ Error: {str(e)}\n\n"
+        # First bytes go out before any agent work starts
+        yield ": connected\n\n"
+        async for event in stream_crew_events(trip_request):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
 
     # ✅ Explicit headers for SSE
     headers = {
@@ -199,22 +249,21 @@ async def stream_trip(trip_request: TripRequest, settings: Settings = Depends(va
 # ---------- WebSocket Streaming Endpoint ---------- #
 @app.websocket("/ws/stream")
 async def websocket_stream(websocket: WebSocket):
-    """WebSocket endpoint for real-time travel planning updates."""
+    """
+    WebSocket endpoint for real-time travel planning updates.
+
+    The client sends one TripRequest as JSON and receives progress events as JSON.
+    """
     await websocket.accept()
-    messages = [
-        "🔍 Querying travel recommendations...",
-        "🧠 Analyzing your preferences...",
-        "📅 Optimizing itinerary...",
-        "💰 Estimating budget...",
-        "🏖️ Selecting top experiences...",
-        "✅ Plan ready to deliver!"
-    ]
     try:
-        for msg in messages:
-            await websocket.send_text(msg)
-            await asyncio.sleep(2)  # simulate delay
+        trip_request = TripRequest(**await websocket.receive_json())
+        if trip_request.end_date <= trip_request.start_date:
+            await websocket.send_json({"type": "error", "message": "End date must be after start date"})
+            return
+        async for event in stream_crew_events(trip_request):
+            await websocket.send_text(json.dumps(event, default=str))
     except Exception as e:
-        await websocket.send_text(f"❌ WebSocket error: {str(e)}")
+        await websocket.send_json({"type": "error", "message": f"WebSocket error: {str(e)}"})
     finally:
         await websocket.close()
 